@@ -5,19 +5,28 @@ Kantipur Engineering College - BCT 5th Semester
 This version uses RAW SQL instead of SQLAlchemy ORM
 """
 
-import sqlite3
 import os
+import csv
+import tempfile
 import cv2
+import click
 import numpy as np
-import face_recognition
-import qrcode
-import json
-import pickle
-import base64
 from datetime import datetime, date, timedelta
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file, Response
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file, Response, g, stream_with_context
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
+from database import ConnectionPool, BatchWriter, migrate_schema, column_names
+from face_gallery import (gallery_cache, encoding_cache, encode_encoding, decode_encodings,
+                          build_template, migrate_legacy_encodings, verify)
+from face_index import campus_index
+from camera import ThreadedCameraPipeline, CameraHub
+from image_io import split_data_url, decode_image_bytes, decode_image_data, save_image_async
+import reports
+from qr_codes import qr_cache, payload_key, RotatingTokenSigner, InvalidToken
+from checkin_cache import CheckinCache, InvalidationSignal
+from geofence import Geofence, DEFAULT_ZONES, load_zones, parse_point
+from student_import import import_students, hash_pool
+import face_enrollment
 
 # ============================================================================
 # Configuration
@@ -31,6 +40,31 @@ app = Flask(__name__)
 app.config['SECRET_KEY'] = 'face-attendance-secret-key-2024'
 app.config['UPLOAD_FOLDER'] = 'static/images/faces'
 app.config['DATABASE'] = os.path.join(os.path.dirname(__file__), 'instance', 'attendance.db')
+app.config['FACE_DETECT_MAX_WIDTH'] = 640  # frames wider than this are downscaled before HOG detection
+app.config['FACE_VERIFY_MAX_WIDTH'] = 480  # selfies fill the frame, so 1:1 verification can detect smaller
+app.config['SAVE_FACE_IMAGES'] = os.environ.get('SAVE_FACE_IMAGES', 'true').lower() == 'true'
+app.config['MAX_FACE_SAMPLES'] = 10  # oldest enrollment samples beyond this are dropped
+app.config['FACE_INDEX_BACKEND'] = os.environ.get('FACE_INDEX_BACKEND', 'ivf')  # 'exact' or 'ivf'
+app.config['FACE_INDEX_PATH'] = os.path.join(os.path.dirname(__file__), 'instance', 'face_index.npz')
+app.config['VIDEO_DETECT_SCALE'] = float(os.environ.get('VIDEO_DETECT_SCALE', 0.25))  # live feed detects on a downscaled copy
+app.config['VIDEO_DETECT_EVERY'] = int(os.environ.get('VIDEO_DETECT_EVERY', 5))  # frames in between are tracked
+app.config['QR_ROTATE_SECONDS'] = int(os.environ.get('QR_ROTATE_SECONDS', 15))  # 0 shows one static code per session
+app.config['QR_TOKEN_SECRET'] = os.environ.get('QR_TOKEN_SECRET', app.config['SECRET_KEY'])  # same in every worker
+app.config['CACHE_SIGNAL_PATH'] = os.path.join(os.path.dirname(__file__), 'instance', 'cache.signal')  # touched to clear other workers' caches
+app.config['FACE_SIGNAL_PATH'] = os.path.join(os.path.dirname(__file__), 'instance', 'faces.signal')  # touched whenever enrolled face data changes
+app.config['CAMPUS_ZONES'] = (load_zones(os.environ['CAMPUS_ZONES_FILE'])  # JSON list of circle/polygon zones
+                              if os.environ.get('CAMPUS_ZONES_FILE') else DEFAULT_ZONES)
+app.config['IMPORT_HASH_WORKERS'] = int(os.environ.get('IMPORT_HASH_WORKERS', os.cpu_count() or 1))  # password hashing processes, 1 hashes in-process
+app.config['LOW_ATTENDANCE_THRESHOLD'] = 75  # percent, students below it are flagged to their teachers
+app.config['DB_POOL_SIZE'] = 8  # idle SQLite connections kept for reuse
+app.config['DB_LOCK_TIMEOUT'] = 30.0  # seconds to wait for a lock instead of failing with 'database is locked'
+app.config['SQLITE_PRAGMAS'] = {  # applied once when a pooled connection is opened
+    'journal_mode': 'WAL',  # readers don't block the writer and vice versa
+    'synchronous': 'NORMAL',  # safe with WAL, fsync only at checkpoints
+    'cache_size': -16000,  # KiB
+    'mmap_size': 268435456,  # 256 MB
+    'temp_store': 'MEMORY',
+}
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs('ssl', exist_ok=True)
 os.makedirs(os.path.dirname(app.config['DATABASE']), exist_ok=True)
@@ -39,11 +73,229 @@ os.makedirs(os.path.dirname(app.config['DATABASE']), exist_ok=True)
 # DATABASE CONNECTION (SQLite)
 # ============================================================================
 
+def get_db_pool():
+    """Return the connection pool for the configured database file"""
+    pool = app.extensions.get('db_pool')
+    if pool is None or pool.path != app.config['DATABASE']:
+        pool = ConnectionPool(app.config['DATABASE'], app.config['SQLITE_PRAGMAS'],
+                              max_idle=app.config['DB_POOL_SIZE'], timeout=app.config['DB_LOCK_TIMEOUT'])
+        app.extensions['db_pool'] = pool
+    return pool
+
 def get_db_connection():
-    """Create and return a database connection"""
-    conn = sqlite3.connect(app.config['DATABASE'])
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Return the database connection of the current app context, borrowing one from the pool on first use"""
+    if 'db' not in g:
+        g.db = get_db_pool().acquire()
+    return g.db
+
+def get_db_writer():
+    """Return the single writer thread that group-commits queued attendance inserts"""
+    writer = app.extensions.get('db_writer')
+    if writer is None or writer.pool is not get_db_pool():
+        writer = BatchWriter(get_db_pool())
+        app.extensions['db_writer'] = writer
+    return writer
+
+def get_qr_signer():
+    """Process-wide signer for rotating attendance QR tokens"""
+    if 'qr_signer' not in app.extensions:
+        app.extensions['qr_signer'] = RotatingTokenSigner(app.config['QR_TOKEN_SECRET'],
+                                                          period=app.config['QR_ROTATE_SECONDS'] or 15)
+    return app.extensions['qr_signer']
+
+def get_checkin_cache():
+    """Process-wide cache of active QR sessions and students for the check-in path"""
+    if 'checkin_cache' not in app.extensions:
+        app.extensions['checkin_cache'] = CheckinCache(InvalidationSignal(app.config['CACHE_SIGNAL_PATH']))
+    return app.extensions['checkin_cache']
+
+def get_geofence():
+    """Campus zones, projected once per process"""
+    if 'geofence' not in app.extensions:
+        app.extensions['geofence'] = Geofence(app.config['CAMPUS_ZONES'])
+    return app.extensions['geofence']
+
+def get_hash_pool():
+    """Process-wide pool for hashing imported students' passwords, None when hashing in-process"""
+    if app.config['IMPORT_HASH_WORKERS'] <= 1:
+        return None
+    if 'hash_pool' not in app.extensions:
+        app.extensions['hash_pool'] = hash_pool(app.config['IMPORT_HASH_WORKERS'])
+    return app.extensions['hash_pool']
+
+def get_face_signal():
+    """Signal file bumped whenever enrolled face data changes"""
+    if 'face_signal' not in app.extensions:
+        app.extensions['face_signal'] = InvalidationSignal(app.config['FACE_SIGNAL_PATH'])
+    return app.extensions['face_signal']
+
+def notify_face_change():
+    """Tell the other workers to drop their face caches, this one already updated its own"""
+    signal = get_face_signal()
+    signal.bump()
+    app.extensions['face_signal_version'] = signal.version()
+
+@app.before_request
+def sync_face_caches():
+    """Drop this worker's face galleries and index after another process changed face data"""
+    version = get_face_signal().version()
+    if version != app.extensions.get('face_signal_version', version):
+        gallery_cache.invalidate()
+        encoding_cache.invalidate()
+        campus_index.discard()
+    app.extensions['face_signal_version'] = version
+
+@app.teardown_appcontext
+def release_db_connection(exception):
+    """Hand the context's connection back to the pool at the end of the request"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        get_db_pool().release(conn)
+
+# ============================================================================
+# SCHEMA MIGRATIONS (APPLIED IN ORDER, TRACKED WITH PRAGMA user_version)
+# ============================================================================
+
+def migration_001_qr_sessions_and_location(conn):
+    """Tables and columns the QR attendance flow uses but older databases never created"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS qr_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_code TEXT NOT NULL UNIQUE,
+            subject_id INTEGER NOT NULL,
+            section_id INTEGER NOT NULL,
+            teacher_id INTEGER NOT NULL,
+            created_at DATETIME NOT NULL,
+            expires_at DATETIME NOT NULL,
+            is_active INTEGER DEFAULT 1,
+            FOREIGN KEY (subject_id) REFERENCES subject(id),
+            FOREIGN KEY (section_id) REFERENCES section(id),
+            FOREIGN KEY (teacher_id) REFERENCES user(id)
+        )
+    """)
+    columns = column_names(conn, 'attendance')
+    for column in ('latitude', 'longitude'):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE attendance ADD COLUMN {column} TEXT")
+
+def migration_002_attendance_indexes(conn):
+    """One attendance row per student, subject and day, plus indexes for the hot lookups"""
+    # Keep the latest row of any duplicates written before the constraint existed
+    conn.execute("""
+        DELETE FROM attendance WHERE id NOT IN (
+            SELECT MAX(id) FROM attendance GROUP BY student_id, subject_id, class_date
+        )
+    """)
+    # Also serves every lookup by student_id (leftmost column)
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_attendance_student_subject_date
+        ON attendance(student_id, subject_id, class_date)
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_student_section ON student(section_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_subject_teacher ON subject(teacher_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_alerts_created_at ON alerts(created_at)")
+    # qr_sessions(session_code) is already indexed by its UNIQUE constraint
+
+def migration_003_report_indexes(conn):
+    """Indexes for the date-range and per-subject report aggregates"""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_attendance_date_status ON attendance(class_date, status)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_attendance_subject_date ON attendance(subject_id, class_date)")
+
+# Counts for one status of a row, used by the summary triggers below
+_STATUS_COUNTS = "{row}.status = 'present', {row}.status = 'absent', {row}.status = 'late'"
+
+def _summary_add(row):
+    return f"""
+        INSERT INTO attendance_summary (student_id, subject_id, present, absent, late, total, last_date)
+        VALUES ({row}.student_id, {row}.subject_id, {_STATUS_COUNTS.format(row=row)}, 1, {row}.class_date)
+        ON CONFLICT(student_id, subject_id) DO UPDATE SET
+            present = present + excluded.present,
+            absent = absent + excluded.absent,
+            late = late + excluded.late,
+            total = total + 1,
+            last_date = MAX(COALESCE(last_date, ''), excluded.last_date);
+    """
+
+def _summary_remove(row):
+    return f"""
+        UPDATE attendance_summary SET
+            present = present - ({row}.status = 'present'),
+            absent = absent - ({row}.status = 'absent'),
+            late = late - ({row}.status = 'late'),
+            total = total - 1,
+            last_date = (SELECT MAX(class_date) FROM attendance
+                         WHERE student_id = {row}.student_id AND subject_id = {row}.subject_id)
+        WHERE student_id = {row}.student_id AND subject_id = {row}.subject_id;
+        DELETE FROM attendance_summary
+        WHERE student_id = {row}.student_id AND subject_id = {row}.subject_id AND total <= 0;
+    """
+
+def rebuild_attendance_summary(conn):
+    """Recompute attendance_summary from scratch, returns the number of summary rows"""
+    conn.execute("DELETE FROM attendance_summary")
+    cursor = conn.execute("""
+        INSERT INTO attendance_summary (student_id, subject_id, present, absent, late, total, last_date)
+        SELECT student_id, subject_id,
+               SUM(status = 'present'), SUM(status = 'absent'), SUM(status = 'late'),
+               COUNT(*), MAX(class_date)
+        FROM attendance
+        GROUP BY student_id, subject_id
+    """)
+    return cursor.rowcount
+
+def migration_004_attendance_summary(conn):
+    """Per student and subject totals, kept current by triggers in the writing transaction"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS attendance_summary (
+            student_id INTEGER NOT NULL,
+            subject_id INTEGER NOT NULL,
+            present INTEGER NOT NULL DEFAULT 0,
+            absent INTEGER NOT NULL DEFAULT 0,
+            late INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            last_date TEXT,
+            PRIMARY KEY (student_id, subject_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_attendance_summary_subject ON attendance_summary(subject_id)")
+    # Triggers cover every writer (QR, manual, face, deletes), so no code path can forget the summary
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS attendance_summary_insert AFTER INSERT ON attendance BEGIN {_summary_add('NEW')} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS attendance_summary_delete AFTER DELETE ON attendance BEGIN {_summary_remove('OLD')} END")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS attendance_summary_update
+        AFTER UPDATE OF student_id, subject_id, class_date, status ON attendance
+        BEGIN {_summary_remove('OLD')} {_summary_add('NEW')} END
+    """)
+    rebuild_attendance_summary(conn)
+
+def _version_bump(row):
+    return f"""
+        INSERT INTO attendance_version (subject_id, version) VALUES ({row}.subject_id, 1)
+        ON CONFLICT(subject_id) DO UPDATE SET version = version + 1;
+    """
+
+def migration_005_attendance_versions(conn):
+    """Per subject write counter, the cache key of the attendance register"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS attendance_version (
+            subject_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS attendance_version_insert AFTER INSERT ON attendance BEGIN {_version_bump('NEW')} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS attendance_version_delete AFTER DELETE ON attendance BEGIN {_version_bump('OLD')} END")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS attendance_version_update AFTER UPDATE ON attendance
+        BEGIN {_version_bump('OLD')} {_version_bump('NEW')} END
+    """)
+
+SCHEMA_MIGRATIONS = [
+    migration_001_qr_sessions_and_location,
+    migration_002_attendance_indexes,
+    migration_003_report_indexes,
+    migration_004_attendance_summary,
+    migration_005_attendance_versions,
+]
 
 # ============================================================================
 # DATABASE SETUP (CREATE TABLES WITH SQL)
@@ -122,6 +374,19 @@ def init_database():
         )
     """)
     
+    # Create FACE_SAMPLE table (every enrollment capture, student.face_encoding holds their template)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS face_sample (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL,
+            encoding BLOB NOT NULL,
+            image_path VARCHAR(255),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (student_id) REFERENCES student(id)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_face_sample_student ON face_sample(student_id)")
+    
     # Create ALERTS table
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS alerts (
@@ -140,6 +405,10 @@ def init_database():
     
     conn.commit()
     
+    # Bring older databases up to the current schema
+    for name in migrate_schema(conn, SCHEMA_MIGRATIONS):
+        print(f"Applied schema migration {name}")
+    
     # Create default data
     cursor.execute("SELECT COUNT(*) FROM section")
     if cursor.fetchone()[0] == 0:
@@ -149,6 +418,17 @@ def init_database():
     # Migration: Set is_active = 1 for all users (fix NULL values)
     cursor.execute("UPDATE user SET is_active = 1 WHERE is_active IS NULL")
     
+    # Migration: Rewrite pickled face encodings in the compact binary format
+    migrate_legacy_encodings(conn)
+    
+    # Migration: Keep single-capture encodings as the student's first sample
+    cursor.execute("""
+        INSERT INTO face_sample (student_id, encoding, image_path)
+        SELECT id, face_encoding, face_image_path FROM student
+        WHERE face_encoding IS NOT NULL
+        AND id NOT IN (SELECT student_id FROM face_sample)
+    """)
+    
     cursor.execute("SELECT COUNT(*) FROM user WHERE username = 'admin'")
     if cursor.fetchone()[0] == 0:
         cursor.execute("""
@@ -163,7 +443,6 @@ def init_database():
     
     conn.commit()
     cursor.close()
-    conn.close()
     print("Database initialized with SQLite!")
 
 # ============================================================================
@@ -187,7 +466,6 @@ def execute_query(query, params=None, fetch=False):
     
     conn.commit()
     cursor.close()
-    conn.close()
     return result
 
 def execute_query_all(query, params=None):
@@ -202,9 +480,211 @@ def execute_query_all(query, params=None):
     
     result = cursor.fetchall()
     cursor.close()
-    conn.close()
     return result
 
+# ============================================================================
+# FACE GALLERY (IN-MEMORY ENCODINGS PER SECTION)
+# ============================================================================
+
+def load_section_encodings(section_id):
+    """Load template rows and multi-sample rows for every enrolled student of a section"""
+    templates = execute_query_all(
+        "SELECT id, face_encoding FROM student WHERE section_id = ? AND face_encoding IS NOT NULL",
+        (section_id,)
+    )
+    # Single-sample students are fully described by their template
+    samples = execute_query_all("""
+        SELECT fs.student_id, fs.encoding FROM face_sample fs
+        JOIN student s ON fs.student_id = s.id
+        WHERE s.section_id = ? AND fs.student_id IN (
+            SELECT student_id FROM face_sample GROUP BY student_id HAVING COUNT(*) > 1
+        )
+    """, (section_id,))
+    return templates, samples
+
+def get_section_gallery(section_id):
+    """Return the resident encoding matrix for a section, loading it on first use"""
+    return gallery_cache.get(section_id, load_section_encodings)
+
+def load_student_encoding(user_id):
+    """Load (student id, section id, template + samples) for the student owning a user account"""
+    student = execute_query(
+        "SELECT id, section_id, face_encoding FROM student WHERE user_id = ?",
+        (user_id,)
+    )
+    if not student:
+        return None
+    if not student['face_encoding']:
+        return student['id'], student['section_id'], None
+    
+    samples = execute_query_all("SELECT encoding FROM face_sample WHERE student_id = ?", (student['id'],))
+    blobs = [student['face_encoding']] + [row['encoding'] for row in samples]
+    return student['id'], student['section_id'], decode_encodings(blobs)
+
+def store_face_samples(student_id, encodings, image_paths, replace=False):
+    """Add enrollment samples and rebuild the student's template in one transaction"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    if replace:
+        cursor.execute("DELETE FROM face_sample WHERE student_id = ?", (student_id,))
+    
+    cursor.executemany("""
+        INSERT INTO face_sample (student_id, encoding, image_path)
+        VALUES (?, ?, ?)
+    """, [(student_id, encode_encoding(encoding), path) for encoding, path in zip(encodings, image_paths)])
+    
+    # Drop the oldest samples beyond the limit
+    cursor.execute("""
+        DELETE FROM face_sample
+        WHERE student_id = ? AND id NOT IN (
+            SELECT id FROM face_sample WHERE student_id = ? ORDER BY id DESC LIMIT ?
+        )
+    """, (student_id, student_id, app.config['MAX_FACE_SAMPLES']))
+    
+    cursor.execute("SELECT encoding FROM face_sample WHERE student_id = ?", (student_id,))
+    samples = decode_encodings([row['encoding'] for row in cursor.fetchall()])
+    
+    template = build_template(samples)
+    # face_image_path keeps the last saved photo when these samples came without one
+    cursor.execute("""
+        UPDATE student 
+        SET face_encoding = ?, face_image_path = COALESCE(?, face_image_path)
+        WHERE id = ?
+    """, (encode_encoding(template), image_paths[-1], student_id))
+    
+    conn.commit()
+    cursor.close()
+    campus_index.upsert(student_id, template, face_index_fingerprint())
+    notify_face_change()
+    return len(samples)
+
+def load_campus_encodings():
+    """Load (ids, template matrix) for every enrolled student of the college"""
+    rows = execute_query_all("SELECT id, face_encoding FROM student WHERE face_encoding IS NOT NULL")
+    ids = [row['id'] for row in rows]
+    vectors = decode_encodings([row['face_encoding'] for row in rows]) if rows else np.empty((0, 128))
+    return ids, vectors
+
+def face_index_fingerprint():
+    """Cheap summary of the enrolled face data, changes with every enrollment or deletion"""
+    row = execute_query("""
+        SELECT (SELECT COUNT(*) FROM student WHERE face_encoding IS NOT NULL) as templates,
+               COUNT(*) as samples, COALESCE(MAX(id), 0) as last_sample
+        FROM face_sample
+    """)
+    return f"{row['templates']}:{row['samples']}:{row['last_sample']}"
+
+def search_campus_index(probes):
+    """Search the college-wide 1:N index, loading it from disk or (re)building it when the data changed"""
+    return campus_index.search(probes, app.config['FACE_INDEX_PATH'], app.config['FACE_INDEX_BACKEND'],
+                               load_campus_encodings, face_index_fingerprint())
+
+def get_student_encoding(user_id):
+    """Return the cached 1:1 verification data for a user, loading it on first use"""
+    return encoding_cache.get(user_id, load_student_encoding)
+
+def encode_faces(rgb_image, max_width=None):
+    """Detect every face on a downscaled copy and encode them at full resolution"""
+    return face_enrollment.encode_faces(rgb_image, max_width or app.config['FACE_DETECT_MAX_WIDTH'])
+
+def student_qr_payload(student):
+    """Data encoded in a student's identity QR code"""
+    return {
+        'student_id': student['id'],
+        'student_user_id': student['user_id'],
+        'student_code': student['student_id'],
+        'name': f"{student['first_name']} {student['last_name']}"
+    }
+
+def session_qr_payload(session, subject_name):
+    """Data encoded in an attendance session QR code, a token for the current slot when rotating"""
+    expires_at = datetime.strptime(session['expires_at'], '%Y-%m-%d %H:%M:%S')
+    payload = {
+        'type': 'attendance_session',
+        'subject_id': session['subject_id'],
+        'section_id': session['section_id'],
+        'subject_name': subject_name,
+        'expires_at': expires_at.isoformat()
+    }
+    if app.config['QR_ROTATE_SECONDS']:
+        payload['token'] = get_qr_signer().issue(session['session_code'], session['subject_id'],
+                                                 session['section_id'], expires_at.timestamp())
+    else:
+        payload['session_code'] = session['session_code']
+    return payload
+
+def checkin_session_entry(session, subject_name):
+    """Cached form of a qr_sessions row for the check-in path"""
+    return {
+        'subject_id': session['subject_id'],
+        'section_id': session['section_id'],
+        'subject_name': subject_name,
+        'expires_at': datetime.strptime(session['expires_at'], '%Y-%m-%d %H:%M:%S').timestamp()
+    }
+
+def load_checkin_session(session_code):
+    session = execute_query(
+        """SELECT qs.*, sub.subject_name FROM qr_sessions qs
+           JOIN subject sub ON qs.subject_id = sub.id
+           WHERE qs.session_code = ? AND qs.is_active = 1
+           AND qs.expires_at > datetime('now', 'localtime')""",
+        (session_code,)
+    )
+    return checkin_session_entry(session, session['subject_name']) if session else None
+
+def class_session_key(subject_id, section_id):
+    """Check-in cache key of a class's active session, kept next to the sessions cached by code"""
+    return ('class', subject_id, section_id)
+
+def load_class_session(key):
+    _, subject_id, section_id = key
+    session = execute_query(
+        """SELECT qs.*, sub.subject_name FROM qr_sessions qs
+           JOIN subject sub ON qs.subject_id = sub.id
+           WHERE qs.subject_id = ? AND qs.section_id = ? AND qs.is_active = 1
+           AND qs.expires_at > datetime('now', 'localtime')
+           ORDER BY qs.expires_at DESC LIMIT 1""",
+        (subject_id, section_id)
+    )
+    return checkin_session_entry(session, session['subject_name']) if session else None
+
+def load_checkin_student(user_id):
+    student = execute_query("SELECT id, section_id FROM student WHERE user_id = ?", (user_id,))
+    return dict(student) if student else None
+
+def qr_image_response(payload, max_age=0):
+    """PNG response for a payload from the QR cache, answering 304 when the ETag still matches"""
+    png, etag = qr_cache.get(payload)
+    response = Response(png, mimetype='image/png')
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = max_age
+    if not max_age:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def mark_face_attendance(subject_id, matches):
+    """Insert 'present' rows for every matched student in one queued batch, return the newly marked ids"""
+    if not matches:
+        return set()
+    
+    today = date.today().isoformat()
+    check_in_time = datetime.now().strftime('%H:%M:%S')
+    
+    # One statement per student, all committed together by the writer: a rowcount of 0 means the
+    # student was already marked, even by a request that overlapped this one
+    writer = get_db_writer()
+    futures = {
+        student_id: writer.submit("""
+            INSERT INTO attendance (student_id, subject_id, class_date, status, check_in_time, face_confidence, is_manual)
+            VALUES (?, ?, ?, 'present', ?, ?, 0)
+            ON CONFLICT (student_id, subject_id, class_date) DO NOTHING
+        """, (student_id, subject_id, today, check_in_time, round(1.0 - distance, 4)))
+        for student_id, distance in matches.items()
+    }
+    return {student_id for student_id, future in futures.items() if future.result(timeout=10.0)}
+
 # ============================================================================
 # LOGIN MANAGER
 # ============================================================================
@@ -297,23 +777,28 @@ def my_qr():
         flash('Student profile not found', 'danger')
         return redirect(url_for('dashboard'))
     
-    # Generate QR code path
-    qr_path = f"static/qr/student_{student['id']}.png"
-    qr_full_path = os.path.join(os.path.dirname(__file__), qr_path)
-    
-    # Generate QR code if it doesn't exist
-    if not os.path.exists(qr_full_path):
-        os.makedirs(os.path.dirname(qr_full_path), exist_ok=True)
-        qr_data = json.dumps({
-            'student_id': student['id'],
-            'student_user_id': current_user.id,
-            'student_code': student['student_id'],
-            'name': f"{student['first_name']} {student['last_name']}"
-        })
-        qr = qrcode.make(qr_data)
-        qr.save(qr_full_path)
+    # The URL carries the payload hash, so the image is re-fetched only when the data changes
+    qr_url = url_for('my_qr_image', v=payload_key(student_qr_payload(student)))
+    
+    return render_template('student/my_qr.html', student=student, qr_url=qr_url)
+
+@app.route('/student/my-qr.png')
+@login_required
+def my_qr_image():
+    if current_user.role != 'student':
+        return redirect(url_for('dashboard'))
     
-    return render_template('student/my_qr.html', student=student, qr_path=qr_path)
+    student = execute_query(
+        "SELECT s.*, u.first_name, u.last_name FROM student s JOIN user u ON s.user_id = u.id WHERE s.user_id = ?",
+        (current_user.id,)
+    )
+    if not student:
+        return Response(status=404)
+    
+    payload = student_qr_payload(student)
+    # Versioned URLs from my_qr can be cached, anything else revalidates against the ETag
+    max_age = 86400 if request.args.get('v') == payload_key(payload) else 0
+    return qr_image_response(payload, max_age)
 
 @app.route('/student/qr-attendance')
 @login_required
@@ -331,16 +816,17 @@ def qr_attendance():
         flash('Student profile not found', 'danger')
         return redirect(url_for('dashboard'))
     
-    # KEC Campus location (Dhapakhel, Lalitpur)
-    campus_lat = 27.6635
-    campus_lng = 85.3161
+    # The page shows the distance to the main campus zone, the server checks every zone
+    zones = app.config['CAMPUS_ZONES']
+    main_zone = zones[0]
     
     return render_template('student/qr_attendance.html',
                          student_id=student['id'],
                          student_code=student['student_id'],
-                         campus_lat=campus_lat,
-                         campus_lng=campus_lng,
-                         allowed_radius=200)
+                         campus_lat=main_zone['center'][0] if 'center' in main_zone else '',
+                         campus_lng=main_zone['center'][1] if 'center' in main_zone else '',
+                         allowed_radius=main_zone.get('radius', ''),
+                         client_check=len(zones) == 1 and 'center' in main_zone)
 
 @app.route('/teacher/generate-qr')
 @login_required
@@ -386,11 +872,21 @@ def show_qr_code():
     conn = get_db_connection()
     cursor = conn.cursor()
     
+    # Drop the rendered images and cached check-in entries of the sessions being replaced
+    replaced_codes = []
+    for old_session in cursor.execute("""
+        SELECT * FROM qr_sessions
+        WHERE subject_id = ? AND section_id = ?
+        AND expires_at > datetime('now', 'localtime')
+    """, (subject_id, section_id)).fetchall():
+        qr_cache.invalidate(session_qr_payload(old_session, subject['subject_name']))
+        replaced_codes.append(old_session['session_code'])
+    
     # Delete any existing active sessions for this subject/section today
     cursor.execute("""
         DELETE FROM qr_sessions 
         WHERE subject_id = ? AND section_id = ? 
-        AND expires_at > datetime('now')
+        AND expires_at > datetime('now', 'localtime')
     """, (subject_id, section_id))
     
     # Insert new session
@@ -403,59 +899,85 @@ def show_qr_code():
     """, (session_code, subject_id, section_id, current_user.id, expires_at.strftime('%Y-%m-%d %H:%M:%S')))
     
     conn.commit()
-    conn.close()
     
-    # Create QR data with session code
-    qr_data = json.dumps({
-        'type': 'attendance_session',
-        'session_code': session_code,
-        'subject_id': subject_id,
-        'section_id': section_id,
+    checkin_cache = get_checkin_cache()
+    class_key = class_session_key(subject['id'], section['id'])
+    if replaced_codes:
+        checkin_cache.invalidate(session_codes=replaced_codes + [class_key])
+    entry = {
+        'subject_id': subject['id'],
+        'section_id': section['id'],
         'subject_name': subject['subject_name'],
-        'expires_at': expires_at.isoformat()
-    })
-    
-    # Generate QR code
-    qr = qrcode.make(qr_data)
-    import io
-    buffer = io.BytesIO()
-    qr.save(buffer, format='PNG')
-    qr_b64 = base64.b64encode(buffer.getvalue()).decode()
+        'expires_at': expires_at.timestamp()
+    }
+    checkin_cache.put_session(session_code, entry)
+    checkin_cache.put_session(class_key, entry)
     
+    # The image is served from its own cacheable route instead of being inlined as base64
     return render_template('teacher/qr_display.html',
-                         qr_image=f"data:image/png;base64,{qr_b64}",
+                         qr_url=url_for('session_qr_image', session_code=session_code),
+                         qr_rotate_seconds=app.config['QR_ROTATE_SECONDS'],
+                         qr_refresh_in=get_qr_signer().seconds_left(),
                          subject=subject,
                          section=section,
                          expires_at=expires_at,
                          expiry_minutes=expiry_minutes)
 
+@app.route('/teacher/qr/<session_code>.png')
+@login_required
+def session_qr_image(session_code):
+    if current_user.role != 'teacher':
+        return redirect(url_for('dashboard'))
+    
+    session = execute_query(
+        """SELECT qs.*, sub.subject_name FROM qr_sessions qs
+           JOIN subject sub ON qs.subject_id = sub.id
+           WHERE qs.session_code = ? AND qs.teacher_id = ? AND qs.is_active = 1
+           AND qs.expires_at > datetime('now', 'localtime')""",
+        (session_code, current_user.id)
+    )
+    if not session:
+        return Response(status=404)
+    
+    if app.config['QR_ROTATE_SECONDS']:
+        # The token changes every slot, browsers may keep the image until then
+        max_age = int(get_qr_signer().seconds_left())
+    else:
+        # A static session image never changes, browsers may keep it until the session expires
+        expires_at = datetime.strptime(session['expires_at'], '%Y-%m-%d %H:%M:%S')
+        max_age = max(0, int((expires_at - datetime.now()).total_seconds()))
+    return qr_image_response(session_qr_payload(session, session['subject_name']), max_age)
+
 @app.route('/student/mark-qr-attendance', methods=['POST'])
 @login_required
 def mark_qr_attendance():
     if current_user.role != 'student':
         return jsonify({'success': False, 'message': 'Unauthorized'})
     
-    student_id = request.form.get('student_id')
+    student_id = request.form.get('student_id', type=int)
     session_code = request.form.get('session_code')
+    token = request.form.get('token')
     latitude = request.form.get('latitude')
     longitude = request.form.get('longitude')
     
+    # Student and session come from the in-memory check-in cache, the database is only hit on a miss
+    checkin_cache = get_checkin_cache()
+    
     # Verify the student owns this request
-    student = execute_query(
-        "SELECT s.id, s.section_id FROM student s WHERE s.user_id = ? AND s.id = ?",
-        (current_user.id, student_id)
-    )
+    student = checkin_cache.get_student(current_user.id, load_checkin_student)
     
-    if not student:
+    if not student or student['id'] != student_id:
         return jsonify({'success': False, 'message': 'Invalid student'})
     
-    # Validate session code
-    session = execute_query(
-        """SELECT * FROM qr_sessions 
-           WHERE session_code = ? AND is_active = 1 
-           AND expires_at > datetime('now')""",
-        (session_code,)
-    )
+    if app.config['QR_ROTATE_SECONDS']:
+        # Rotating token: signature and time slot are checked in memory
+        try:
+            session_code = get_qr_signer().verify(token)['session_code']
+        except InvalidToken:
+            return jsonify({'success': False, 'message': 'Invalid or expired QR code. Please scan the code currently on screen.'})
+    
+    # Validate session code (also rejects the tokens of a session that has been replaced)
+    session = checkin_cache.get_session(session_code, load_checkin_session)
     
     if not session:
         return jsonify({'success': False, 'message': 'Invalid or expired QR code. Please ask teacher for a new QR code.'})
@@ -467,64 +989,36 @@ def mark_qr_attendance():
     if student['section_id'] != section_id:
         return jsonify({'success': False, 'message': 'You are not enrolled in this section.'})
     
-    # Verify location is within campus (KEC: 27.6635, 85.3161)
-    campus_lat = 27.6635
-    campus_lng = 85.3161
-    allowed_radius = 200  # meters
-    
-    from math import radians, sin, cos, sqrt, atan2
-    
-    def haversine(lat1, lon1, lat2, lon2):
-        R = 6371000  # Earth's radius in meters
-        lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1-a))
-        return R * c
-    
+    # Verify location is inside one of the campus zones (NaN, inf and out-of-range values are rejected)
     try:
-        user_lat = float(latitude)
-        user_lng = float(longitude)
-        distance = haversine(user_lat, user_lng, campus_lat, campus_lng)
-        
-        if distance > allowed_radius:
-            return jsonify({
-                'success': False, 
-                'message': f"❌ You're out of location! You are {int(distance)}m away from campus (max: {allowed_radius}m). Please move closer to KEC campus."
-            })
-    except (ValueError, TypeError):
+        zone, distance = get_geofence().check(*parse_point(latitude, longitude))
+    except ValueError:
         return jsonify({'success': False, 'message': 'Invalid location data'})
     
-    today = date.today()
-    current_time = datetime.now().time()
-    
-    # Check existing attendance
-    existing = execute_query(
-        "SELECT id FROM attendance WHERE student_id = ? AND subject_id = ? AND class_date = ?",
-        (student_id, subject_id, today)
-    )
-    
-    if existing:
-        return jsonify({'success': False, 'message': 'Attendance already marked for today'})
+    if zone is None:
+        return jsonify({
+            'success': False, 
+            'message': f"❌ You're out of location! You are {int(distance)}m outside the campus area. Please move closer to KEC campus."
+        })
     
-    # Get subject name
-    subject = execute_query("SELECT subject_name FROM subject WHERE id = ?", (subject_id,))
+    today = date.today().isoformat()
+    current_time = datetime.now().strftime('%H:%M:%S')
     
-    # Insert attendance
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
+    # Insert attendance through the writer thread, which group-commits the check-in burst.
+    # The unique (student, subject, date) index makes this an atomic check-and-insert.
+    inserted = get_db_writer().execute("""
         INSERT INTO attendance (student_id, subject_id, class_date, status, check_in_time, is_manual, latitude, longitude)
         VALUES (?, ?, ?, 'present', ?, 0, ?, ?)
+        ON CONFLICT (student_id, subject_id, class_date) DO NOTHING
     """, (student_id, subject_id, today, current_time, latitude, longitude))
-    conn.commit()
-    conn.close()
+    
+    if not inserted:
+        return jsonify({'success': False, 'message': 'Attendance already marked for today'})
     
     return jsonify({
         'success': True, 
-        'message': '✅ Attendance marked successfully for ' + (subject['subject_name'] if subject else 'Unknown'),
-        'subject_name': subject['subject_name'] if subject else 'Unknown'
+        'message': '✅ Attendance marked successfully for ' + session['subject_name'],
+        'subject_name': session['subject_name']
     })
 
 @app.route('/dashboard')
@@ -567,34 +1061,30 @@ def dashboard():
             flash('Student profile not found', 'danger')
             return redirect(url_for('dashboard'))
         
-        # SQL QUERY: Get all attendance for student
-        attendance_records = execute_query_all(
-            "SELECT * FROM attendance WHERE student_id = ? ORDER BY class_date DESC",
-            (student['id'],)
-        )
+        # SQL QUERY: Per-subject totals from the maintained summary, one row per subject
+        subject_rows = execute_query_all("""
+            SELECT sm.subject_id, sub.subject_code, sub.subject_name,
+                   sm.total, sm.present, sm.absent
+            FROM attendance_summary sm
+            LEFT JOIN subject sub ON sm.subject_id = sub.id
+            WHERE sm.student_id = ?
+            ORDER BY sm.last_date DESC
+        """, (student['id'],))
         
-        # Calculate stats using Python
-        total_classes = len(attendance_records)
-        present_count = sum(1 for a in attendance_records if a['status'] == 'present')
-        absent_count = sum(1 for a in attendance_records if a['status'] == 'absent')
+        # Overall totals come from the same per-subject rows
+        total_classes = sum(row['total'] for row in subject_rows)
+        present_count = sum(row['present'] for row in subject_rows)
+        absent_count = sum(row['absent'] for row in subject_rows)
         attendance_percentage = (present_count / total_classes * 100) if total_classes > 0 else 0
         
-        # Get subject-wise attendance
-        subject_attendance = {}
-        for record in attendance_records:
-            # SQL QUERY: Get subject name
-            subject = execute_query("SELECT * FROM subject WHERE id = ?", (record['subject_id'],))
-            if subject:
-                code = subject['subject_code']
-                if code not in subject_attendance:
-                    subject_attendance[code] = {
-                        'subject_name': subject['subject_name'],
-                        'present': 0,
-                        'total': 0
-                    }
-                subject_attendance[code]['total'] += 1
-                if record['status'] == 'present':
-                    subject_attendance[code]['present'] += 1
+        subject_attendance = {
+            row['subject_code']: {
+                'subject_name': row['subject_name'],
+                'present': row['present'],
+                'total': row['total']
+            }
+            for row in subject_rows if row['subject_code'] is not None
+        }
         
         # Get alerts count for student
         alerts_count = execute_query("SELECT COUNT(*) as count FROM alerts")['count']
@@ -644,7 +1134,6 @@ def manage_students():
         
         conn.commit()
         cursor.close()
-        conn.close()
         flash('Student added successfully', 'success')
     
     # SQL QUERY: Get all students with user info
@@ -660,6 +1149,33 @@ def manage_students():
     
     return render_template('admin/students.html', students=students, sections=sections)
 
+@app.route('/admin/students/import', methods=['POST'])
+@login_required
+def import_students_upload():
+    if current_user.role != 'admin':
+        return redirect(url_for('dashboard'))
+    
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        flash('Please choose a CSV or Excel file', 'warning')
+        return redirect(url_for('manage_students'))
+    
+    try:
+        imported, errors = import_students(get_db_connection(), upload.stream, upload.filename,
+                                           default_password=request.form.get('default_password') or None,
+                                           pool=get_hash_pool())
+    except (ValueError, KeyError) as e:
+        flash(f'Could not read {upload.filename}: {e}', 'danger')
+        return redirect(url_for('manage_students'))
+    
+    if imported:
+        flash(f'Imported {imported} students', 'success')
+    if errors:
+        shown = '; '.join(f'row {line}: {message}' for line, message in errors[:10])
+        more = f' (and {len(errors) - 10} more)' if len(errors) > 10 else ''
+        flash(f'{len(errors)} rows skipped - {shown}{more}', 'warning')
+    return redirect(url_for('manage_students'))
+
 @app.route('/admin/student/delete/<int:student_id>')
 @login_required
 def delete_student(student_id):
@@ -667,14 +1183,18 @@ def delete_student(student_id):
         return redirect(url_for('dashboard'))
     
     # SQL QUERY: Get student
-    student = execute_query("SELECT * FROM student WHERE id = ?", (student_id,))
+    student = execute_query(
+        "SELECT s.*, u.first_name, u.last_name FROM student s JOIN user u ON s.user_id = u.id WHERE s.id = ?",
+        (student_id,)
+    )
     
     if student:
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # SQL DELETE: Delete attendance records first
+        # SQL DELETE: Delete attendance records and face samples first
         cursor.execute("DELETE FROM attendance WHERE student_id = ?", (student_id,))
+        cursor.execute("DELETE FROM face_sample WHERE student_id = ?", (student_id,))
         
         # SQL DELETE: Delete student
         cursor.execute("DELETE FROM student WHERE id = ?", (student_id,))
@@ -684,7 +1204,12 @@ def delete_student(student_id):
         
         conn.commit()
         cursor.close()
-        conn.close()
+        gallery_cache.invalidate(student['section_id'])
+        encoding_cache.invalidate(student['user_id'])
+        campus_index.remove(student_id, face_index_fingerprint())
+        notify_face_change()
+        qr_cache.invalidate(student_qr_payload(student))
+        get_checkin_cache().invalidate(user_ids=[student['user_id']])
         flash('Student deleted successfully', 'success')
     else:
         flash('Student not found', 'danger')
@@ -716,7 +1241,6 @@ def manage_teachers():
         
         conn.commit()
         cursor.close()
-        conn.close()
         flash('Teacher added successfully', 'success')
     
     # SQL QUERY: Get all teachers
@@ -743,25 +1267,30 @@ def take_attendance():
         section = execute_query("SELECT * FROM section WHERE id = ?", (section_id,))
         
         if subject and section:
-            # SQL QUERY: Get students in section
-            students = execute_query_all(
-                "SELECT * FROM student WHERE section_id = ?",
-                (section_id,)
-            )
-            
-            # Get today's attendance
-            today = date.today()
-            attendance_dict = {}
+            # SQL QUERY: Roster and today's attendance for this subject in one LEFT JOIN
+            today = date.today().isoformat()
+            students = execute_query_all("""
+                SELECT s.*, u.first_name, u.last_name,
+                       a.id as attendance_id, a.status as attendance_status,
+                       a.check_in_time, a.face_confidence, a.is_manual
+                FROM student s
+                JOIN user u ON s.user_id = u.id
+                LEFT JOIN attendance a
+                    ON a.student_id = s.id AND a.subject_id = ? AND a.class_date = ?
+                WHERE s.section_id = ?
+                ORDER BY s.roll_number, s.id
+            """, (subject_id, today, section_id))
             
-            for student in students:
-                # SQL QUERY: Check if student has attendance
-                attendance = execute_query("""
-                    SELECT * FROM attendance 
-                    WHERE student_id = ? AND subject_id = ? AND class_date = ?
-                """, (student['id'], subject_id, today))
-                
-                if attendance:
-                    attendance_dict[student['id']] = attendance
+            attendance_dict = {
+                student['id']: {
+                    'id': student['attendance_id'],
+                    'status': student['attendance_status'],
+                    'check_in_time': student['check_in_time'],
+                    'face_confidence': student['face_confidence'],
+                    'is_manual': student['is_manual']
+                }
+                for student in students if student['attendance_id'] is not None
+            }
             
             return render_template('teacher/take_attendance.html',
                                  subject=subject, section=section,
@@ -778,35 +1307,16 @@ def manual_attendance():
     student_id = request.form.get('student_id')
     subject_id = request.form.get('subject_id')
     status = request.form.get('status')
-    today = date.today()
-    current_time = datetime.now().time()
-    
-    # SQL QUERY: Check existing attendance
-    existing = execute_query("""
-        SELECT * FROM attendance 
-        WHERE student_id = ? AND subject_id = ? AND class_date = ?
-    """, (student_id, subject_id, today))
+    today = date.today().isoformat()
+    current_time = datetime.now().strftime('%H:%M:%S')
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    if existing:
-        # SQL UPDATE: Update existing attendance
-        cursor.execute("""
-            UPDATE attendance 
-            SET status = ?, is_manual = 1
-            WHERE id = ?
-        """, (status, existing['id']))
-    else:
-        # SQL INSERT: Create new attendance
-        cursor.execute("""
-            INSERT INTO attendance (student_id, subject_id, class_date, status, check_in_time, is_manual)
-            VALUES (?, ?, ?, ?, ?, 1)
-        """, (student_id, subject_id, today, status, current_time))
-    
-    conn.commit()
-    cursor.close()
-    conn.close()
+    # SQL UPSERT: Create the attendance row, or overwrite the status if one exists
+    get_db_writer().execute("""
+        INSERT INTO attendance (student_id, subject_id, class_date, status, check_in_time, is_manual)
+        VALUES (?, ?, ?, ?, ?, 1)
+        ON CONFLICT (student_id, subject_id, class_date)
+        DO UPDATE SET status = excluded.status, is_manual = 1
+    """, (student_id, subject_id, today, status, current_time))
     
     flash('Attendance marked!', 'success')
     return redirect(url_for('take_attendance', subject_id=subject_id))
@@ -842,78 +1352,211 @@ def capture_face(student_id):
     if current_user.role not in ['admin', 'teacher']:
         return redirect(url_for('dashboard'))
     
-    # SQL QUERY: Get student
-    student = execute_query("SELECT * FROM student WHERE id = ?", (student_id,))
+    # SQL QUERY: Get student with user info
+    student = execute_query("""
+        SELECT s.*, u.first_name, u.last_name
+        FROM student s
+        JOIN user u ON s.user_id = u.id
+        WHERE s.id = ?
+    """, (student_id,))
+    
+    if not student:
+        flash('Student not found', 'danger')
+        return redirect(url_for('manage_students'))
     
     if request.method == 'POST':
-        image_data = request.form.get('image_data')
-        if image_data:
-            image_data = image_data.split(',')[1]
-            image_bytes = base64.b64decode(image_data)
-            
-            filename = f"student_{student_id}.jpg"
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            
-            with open(filepath, 'wb') as f:
-                f.write(image_bytes)
-            
-            # Generate face encoding
+        # Several captures (angles, lighting) can be enrolled in one go
+        images = [image_data for image_data in request.form.getlist('image_data') if image_data]
+        replace = request.form.get('replace_samples') == '1'
+        
+        if images:
             try:
-                image = face_recognition.load_image_file(filepath)
-                encodings = face_recognition.face_encodings(image)
+                encodings = []
+                image_paths = []
+                stamp = datetime.now().strftime('%Y%m%d%H%M%S')
                 
-                if encodings:
-                    # Convert encoding to binary
-                    encoding_binary = pickle.dumps(encodings[0])
-                    
-                    # SQL UPDATE: Store face encoding
-                    conn = get_db_connection()
-                    cursor = conn.cursor()
-                    
-                    cursor.execute("""
-                        UPDATE student 
-                        SET face_encoding = ?, face_image_path = ?
-                        WHERE id = ?
-                    """, (encoding_binary, filepath, student_id))
+                for index, image_data in enumerate(images):
+                    # Generate face encoding straight from the uploaded bytes
+                    image_bytes = split_data_url(image_data)
+                    found = encode_faces(decode_image_bytes(image_bytes))
+                    if not found:
+                        continue
                     
-                    conn.commit()
-                    cursor.close()
-                    conn.close()
+                    # Keeping the original photo is record keeping only, so it happens off the request path.
+                    # Without it the sample has no image path rather than one to a file that never existed.
+                    filepath = None
+                    if app.config['SAVE_FACE_IMAGES']:
+                        filename = f"student_{student_id}_{stamp}_{index}.jpg"
+                        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+                        save_image_async(filepath, image_bytes)
+                    encodings.append(found[0])
+                    image_paths.append(filepath)
+                
+                if encodings:
+                    sample_count = store_face_samples(student_id, encodings, image_paths, replace)
+                    gallery_cache.invalidate(student['section_id'])
+                    encoding_cache.invalidate(student['user_id'])
                     
-                    flash('Face captured successfully!', 'success')
+                    skipped = len(images) - len(encodings)
+                    message = f'Face captured successfully! {sample_count} sample(s) enrolled.'
+                    if skipped:
+                        message += f' {skipped} image(s) had no face and were skipped.'
+                    flash(message, 'success')
                 else:
                     flash('No face detected. Try again.', 'danger')
             except Exception as e:
                 flash(f'Error: {str(e)}', 'danger')
     
-    return render_template('admin/capture_face.html', student=student)
+    sample_count = execute_query(
+        "SELECT COUNT(*) as count FROM face_sample WHERE student_id = ?",
+        (student_id,)
+    )['count']
+    
+    return render_template('admin/capture_face.html', student=student, sample_count=sample_count)
+
+@app.route('/student/verify-face', methods=['POST'])
+@login_required
+def verify_face():
+    if current_user.role != 'student':
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    data = request.get_json(silent=True) or request.form
+    image_data = data.get('image_data')
+    subject_id = data.get('subject_id')
+    
+    if not image_data or not subject_id:
+        return jsonify({'success': False, 'message': 'Image and subject are required'})
+    try:
+        subject_id = int(subject_id)
+    except (ValueError, TypeError):
+        return jsonify({'success': False, 'message': 'Invalid subject'})
+    
+    enrolled = get_student_encoding(current_user.id)
+    if not enrolled:
+        return jsonify({'success': False, 'message': 'Student profile not found'})
+    
+    student_id, section_id, encoding = enrolled
+    if encoding is None:
+        return jsonify({'success': False, 'message': 'Your face is not registered yet. Please contact the admin.'})
+    
+    # Same rules as a QR check-in: the teacher has a session open for this class right now...
+    session = get_checkin_cache().get_session(class_session_key(subject_id, section_id), load_class_session)
+    if not session:
+        return jsonify({'success': False, 'message': 'There is no attendance session open for this subject right now.'})
+    
+    # ...and the student is on campus (NaN, inf and out-of-range values are rejected)
+    try:
+        zone, distance = get_geofence().check(*parse_point(data.get('latitude'), data.get('longitude')))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid location data'})
+    if zone is None:
+        return jsonify({
+            'success': False,
+            'message': f"❌ You're out of location! You are {int(distance)}m outside the campus area. Please move closer to KEC campus."
+        })
+    
+    # 1:1 verification: only the logged-in student's own encoding is compared
+    try:
+        probes = encode_faces(decode_image_data(image_data), app.config['FACE_VERIFY_MAX_WIDTH'])
+    except (ValueError, TypeError) as e:
+        return jsonify({'success': False, 'message': f'Invalid image: {str(e)}'})
+    
+    if not probes:
+        return jsonify({'success': False, 'message': 'No face detected. Please try again.'})
+    
+    matched, distance = verify(probes, encoding)
+    if not matched:
+        return jsonify({'success': False, 'message': 'Face does not match your registered face.'})
+    
+    newly_marked = mark_face_attendance(subject_id, {student_id: distance})
+    if not newly_marked:
+        return jsonify({
+            'success': True,
+            'already_marked': True,
+            'message': 'Attendance already marked for today'
+        })
+    
+    return jsonify({
+        'success': True,
+        'already_marked': False,
+        'confidence': round(1.0 - distance, 4),
+        'message': 'Attendance marked successfully for ' + session['subject_name']
+    })
+
+@app.route('/campus/identify', methods=['POST'])
+@login_required
+def campus_identify():
+    """1:N identification against every enrolled student (open gate, library check-in)"""
+    if current_user.role not in ['admin', 'teacher']:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    data = request.get_json(silent=True) or request.form
+    image_data = data.get('image_data')
+    if not image_data:
+        return jsonify({'success': False, 'message': 'Image is required'})
+    
+    try:
+        probes = encode_faces(decode_image_data(image_data))
+    except (ValueError, TypeError) as e:
+        return jsonify({'success': False, 'message': f'Invalid image: {str(e)}'})
+    
+    matches = {
+        student_id: distance
+        for student_id, distance in search_campus_index(probes)
+        if student_id is not None
+    }
+    
+    students = []
+    if matches:
+        placeholders = ','.join('?' * len(matches))
+        rows = execute_query_all(f"""
+            SELECT s.id, s.student_id, s.section_id, u.first_name, u.last_name
+            FROM student s
+            JOIN user u ON s.user_id = u.id
+            WHERE s.id IN ({placeholders})
+        """, list(matches))
+        students = [
+            {
+                'student_id': row['id'],
+                'student_code': row['student_id'],
+                'section_id': row['section_id'],
+                'name': f"{row['first_name']} {row['last_name']}",
+                'confidence': round(1.0 - matches[row['id']], 4)
+            }
+            for row in rows
+        ]
+    
+    return jsonify({'success': True, 'faces_detected': len(probes), 'students': students})
+
+def create_camera_pipeline():
+    """Capture, detection and JPEG encoding each run on their own thread"""
+    return ThreadedCameraPipeline(
+        lambda: cv2.VideoCapture(0),
+        app.config['VIDEO_DETECT_SCALE'],
+        app.config['VIDEO_DETECT_EVERY']
+    )
+
+# One camera per process, shared by every /video-feed viewer
+camera_hub = CameraHub(create_camera_pipeline)
 
 @app.route('/video-feed')
 def video_feed():
     def generate():
-        camera = cv2.VideoCapture(0)
+        frames = camera_hub.stream()
         try:
-            while True:
-                success, frame = camera.read()
-                if not success:
-                    break
-                frame = cv2.flip(frame, 1)
-                
-                # Detect faces
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                face_locations = face_recognition.face_locations(rgb_frame)
-                
-                for top, right, bottom, left in face_locations:
-                    cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
-                
-                ret, buffer = cv2.imencode('.jpg', frame)
-                frame = buffer.tobytes()
+            for frame in frames:
                 yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
         finally:
-            camera.release()
+            # Viewer disconnected: drop the subscription (the last one releases the camera)
+            frames.close()
     
     return Response(generate(), mimetype='multipart/x-mixed-replace; boundary=frame')
 
+@app.route('/video-feed/stats')
+@login_required
+def video_feed_stats():
+    return jsonify(camera_hub.stats())
+
 @app.route('/teacher/face-attendance', methods=['GET', 'POST'])
 @login_required
 def face_attendance():
@@ -939,12 +1582,74 @@ def face_attendance():
                 WHERE s.section_id = ? AND s.face_encoding IS NOT NULL AND s.face_encoding != ''
             """, (section_id,))
             
+            # Warm the section's gallery so the first frame doesn't pay the load
+            get_section_gallery(section_id)
+            
             return render_template('teacher/face_attendance.html',
                                 subject=subject, section=section,
                                 students=students)
     
     return render_template('teacher/select_attendance.html', subjects=subjects, sections=sections)
 
+@app.route('/teacher/face-attendance/match', methods=['POST'])
+@login_required
+def match_face_attendance():
+    if current_user.role != 'teacher':
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        frames = data.get('frames', [data.get('image_data')])
+        if not isinstance(frames, list) or not all(frame is None or isinstance(frame, str) for frame in frames):
+            return jsonify({'success': False, 'message': 'frames must be a list of images'})
+    else:
+        data = request.form
+        frames = data.getlist('frames') or [data.get('image_data')]
+    subject_id = data.get('subject_id')
+    section_id = data.get('section_id')
+    frames = [frame for frame in frames if frame]
+    
+    if not subject_id or not section_id or not frames:
+        return jsonify({'success': False, 'message': 'Subject, section and at least one frame are required'})
+    
+    try:
+        subject_id, section_id = int(subject_id), int(section_id)
+    except (ValueError, TypeError):
+        return jsonify({'success': False, 'message': 'Invalid subject or section'})
+    
+    subject = execute_query(
+        "SELECT * FROM subject WHERE id = ? AND teacher_id = ?",
+        (subject_id, current_user.id)
+    )
+    if not subject:
+        return jsonify({'success': False, 'message': 'Invalid subject'})
+    # Only the subject's own section can be matched and marked
+    if subject['section_id'] is not None and subject['section_id'] != section_id:
+        return jsonify({'success': False, 'message': 'This subject is not taught to that section'})
+    
+    # Detect and encode every face of every frame, then match them all in one pass
+    try:
+        probes = [encoding for frame in frames for encoding in encode_faces(decode_image_data(frame))]
+    except (ValueError, TypeError) as e:
+        return jsonify({'success': False, 'message': f'Invalid image: {str(e)}'})
+    
+    matches = get_section_gallery(section_id).identify(probes)
+    newly_marked = mark_face_attendance(subject_id, matches)
+    
+    return jsonify({
+        'success': True,
+        'faces_detected': len(probes),
+        'recognized': [
+            {
+                'student_id': student_id,
+                'confidence': round(1.0 - distance, 4),
+                'newly_marked': student_id in newly_marked
+            }
+            for student_id, distance in matches.items()
+        ],
+        'message': f'{len(matches)} of {len(probes)} faces recognized, {len(newly_marked)} newly marked present'
+    })
+
 @app.route('/admin/subjects', methods=['GET', 'POST'])
 @login_required
 def manage_subjects():
@@ -969,7 +1674,6 @@ def manage_subjects():
         
         conn.commit()
         cursor.close()
-        conn.close()
         flash('Subject added successfully', 'success')
     
     # SQL QUERIES
@@ -995,20 +1699,66 @@ def admin_reports():
     total_teachers = execute_query("SELECT COUNT(*) as count FROM user WHERE role = 'teacher'")['count']
     total_subjects = execute_query("SELECT COUNT(*) as count FROM subject")['count']
     
-    # Get attendance stats
-    attendance = execute_query_all("SELECT * FROM attendance")
-    present_count = sum(1 for a in attendance if a['status'] == 'present')
-    absent_count = sum(1 for a in attendance if a['status'] == 'absent')
+    # Aggregate in SQL, only the summary rows and one page of records are fetched
+    filters = reports.AttendanceFilter.from_args(request.args)
+    conn = get_db_connection()
+    status_totals = reports.status_counts(conn, filters)
+    by_subject = [dict(row) for row in reports.counts_by_subject(conn, filters)]
+    by_section = reports.counts_by_section(conn, filters)
+    by_date = [dict(row) for row in reports.counts_by_date(conn, filters)]
+    records, next_before = reports.drilldown(conn, filters, request.args.get('before', type=int))
+    
+    sections = execute_query_all("SELECT * FROM section ORDER BY name")
+    subjects = execute_query_all("SELECT * FROM subject ORDER BY subject_code")
     
     return render_template('admin/reports.html',
-                    total_students=total_students,
+                        total_students=total_students,
                         total_teachers=total_teachers,
                         total_subjects=total_subjects,
-                        present_count=present_count,
-                        absent_count=absent_count)
+                        present_count=status_totals.get('present', 0),
+                        absent_count=status_totals.get('absent', 0),
+                        status_totals=status_totals,
+                        by_subject=by_subject,
+                        by_section=by_section,
+                        by_date=by_date,
+                        records=records,
+                        next_before=next_before,
+                        filters=filters,
+                        sections=sections,
+                        subjects=subjects)
 
 
 
+@app.route('/reports/export')
+@login_required
+def export_attendance():
+    if current_user.role not in ('admin', 'teacher'):
+        return redirect(url_for('dashboard'))
+    
+    filters = reports.AttendanceFilter.from_args(request.args)
+    extra = None
+    if current_user.role == 'teacher':
+        # Teachers export only the subjects they teach
+        extra = reports.taught_by(current_user.id)
+    chunks = reports.export_chunks(get_db_connection(), filters, extra)
+    filename = f"attendance_{date.today().isoformat()}"
+    
+    if request.args.get('format') == 'xlsx':
+        # An XLSX is a zip that is only complete once closed: build it on disk row by row, then stream it
+        fd, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+        try:
+            reports.write_xlsx(chunks, path)
+        except Exception:
+            os.remove(path)
+            raise
+        return Response(reports.iter_file(path),
+                        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                        headers={'Content-Disposition': f'attachment; filename={filename}.xlsx'})
+    
+    return Response(stream_with_context(reports.iter_csv(chunks)), mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename={filename}.csv'})
+
 @app.route('/teacher/add-class', methods=['GET', 'POST'])
 @login_required
 def add_class():
@@ -1034,10 +1784,48 @@ def teacher_reports():
     if current_user.role != 'teacher':
         return redirect(url_for('dashboard'))
     
-    # Get teacher's subjects
-    subjects = execute_query_all("SELECT * FROM subject WHERE teacher_id = ?", (current_user.id,))
+    # Get teacher's subjects with their totals from the attendance summary
+    subjects = execute_query_all("""
+        SELECT sub.*,
+               COUNT(sm.student_id) as students,
+               COALESCE(SUM(sm.present), 0) as present,
+               COALESCE(SUM(sm.total), 0) as total,
+               COALESCE(SUM(sm.present * 100 < ? * sm.total), 0) as low_attendance
+        FROM subject sub
+        LEFT JOIN attendance_summary sm ON sm.subject_id = sub.id
+        WHERE sub.teacher_id = ?
+        GROUP BY sub.id
+    """, (app.config['LOW_ATTENDANCE_THRESHOLD'], current_user.id))
+    
+    return render_template('teacher/reports.html', subjects=subjects,
+                           threshold=app.config['LOW_ATTENDANCE_THRESHOLD'])
+
+@app.route('/teacher/register/<int:subject_id>')
+@login_required
+def attendance_register(subject_id):
+    if current_user.role not in ('admin', 'teacher'):
+        return redirect(url_for('dashboard'))
+    
+    subject = execute_query("SELECT * FROM subject WHERE id = ?", (subject_id,))
+    if not subject or (current_user.role == 'teacher' and subject['teacher_id'] != current_user.id):
+        flash('Subject not found', 'danger')
+        return redirect(url_for('dashboard'))
     
-    return render_template('teacher/reports.html', subjects=subjects)
+    section_id = request.args.get('section_id', type=int) or subject['section_id']
+    sections = execute_query_all("SELECT * FROM section ORDER BY name")
+    section = next((sec for sec in sections if sec['id'] == section_id), None)
+    if section is None:
+        flash('Choose a section for this subject', 'warning')
+        return redirect(url_for('teacher_reports' if current_user.role == 'teacher' else 'admin_reports'))
+    
+    # Rebuilt only when this subject's attendance or the section roster changed since the last view
+    register = reports.register_cache.get(get_db_connection(), subject_id, section_id)
+    pages = register.pages()
+    page = min(max(request.args.get('page', 1, type=int), 1), pages)
+    
+    return render_template('teacher/register.html', subject=subject, section=section, sections=sections,
+                           register=register, rows=register.page(page), page=page, pages=pages,
+                           threshold=app.config['LOW_ATTENDANCE_THRESHOLD'])
 
 @app.route('/teacher/send-alerts', methods=['GET', 'POST'])
 @login_required
@@ -1060,14 +1848,29 @@ def send_alerts():
         """, (current_user.id, subject_id, section_id, message, alert_type))
         conn.commit()
         cursor.close()
-        conn.close()
         
         flash('Alert sent successfully!', 'success')
         return redirect(url_for('dashboard'))
     
     subjects = execute_query_all("SELECT * FROM subject WHERE teacher_id = ?", (current_user.id,))
     sections = execute_query_all("SELECT * FROM section")
-    return render_template('teacher/send_alerts.html', subjects=subjects, sections=sections)
+    
+    # Students below the threshold in this teacher's subjects, straight from the summary
+    low_attendance = execute_query_all("""
+        SELECT sm.present, sm.total, st.student_id as student_code,
+               u.first_name, u.last_name, sub.subject_code
+        FROM attendance_summary sm
+        JOIN subject sub ON sm.subject_id = sub.id
+        JOIN student st ON sm.student_id = st.id
+        JOIN user u ON st.user_id = u.id
+        WHERE sub.teacher_id = ? AND sm.present * 100 < ? * sm.total
+        ORDER BY sm.present * 1.0 / sm.total
+        LIMIT 100
+    """, (current_user.id, app.config['LOW_ATTENDANCE_THRESHOLD']))
+    
+    return render_template('teacher/send_alerts.html', subjects=subjects, sections=sections,
+                           low_attendance=low_attendance,
+                           threshold=app.config['LOW_ATTENDANCE_THRESHOLD'])
 
 
 
@@ -1094,10 +1897,127 @@ def student_alerts():
     
     return render_template('student/alerts.html', alerts=alerts)
 
+# ============================================================================
+# CLI COMMANDS
+# ============================================================================
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create the tables, apply pending schema migrations and seed default data"""
+    init_database()
+
+@app.cli.command('migrate-encodings')
+def migrate_encodings_command():
+    """Rewrite pickled face encodings in the compact binary format"""
+    conn = get_db_connection()
+    migrated = migrate_legacy_encodings(conn)
+    gallery_cache.invalidate()
+    encoding_cache.invalidate()
+    if migrated:
+        notify_face_change()
+    print(f"Migrated {migrated} face encodings")
+
+@app.cli.command('rebuild-attendance-summary')
+def rebuild_attendance_summary_command():
+    """Recompute the attendance summary table from the raw attendance rows"""
+    conn = get_db_connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rows = rebuild_attendance_summary(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    print(f"Rebuilt attendance summary ({rows} student/subject rows)")
+
+@app.cli.command('import-students')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--default-password', default=None, help='Password for rows without one')
+@click.option('--workers', type=int, default=None, help='Password hashing processes (default: all cores)')
+def import_students_command(path, default_password, workers):
+    """Import students from a CSV or XLSX file"""
+    if workers:
+        app.config['IMPORT_HASH_WORKERS'] = workers
+    with open(path, 'rb') as f:
+        imported, errors = import_students(get_db_connection(), f, path, default_password, get_hash_pool())
+    for line, message in errors:
+        print(f"row {line}: {message}")
+    print(f"Imported {imported} students, skipped {len(errors)} rows")
+
+@app.cli.command('enroll-faces')
+@click.argument('source', type=click.Path(exists=True))
+@click.option('--replace', is_flag=True, help="Replace the students' existing face samples")
+@click.option('--workers', type=int, default=None, help='Encoding processes (default: all cores)')
+@click.option('--report', 'report_path', type=click.Path(dir_okay=False), default=None,
+              help='Write a CSV line per photo with its outcome')
+def enroll_faces_command(source, replace, workers, report_path):
+    """Enroll faces from a folder or ZIP of photos named by student ID"""
+    report, templates = face_enrollment.enroll_photos(
+        get_db_connection(), source,
+        max_width=app.config['FACE_DETECT_MAX_WIDTH'],
+        max_samples=app.config['MAX_FACE_SAMPLES'],
+        replace=replace, workers=workers,
+        save_dir=app.config['UPLOAD_FOLDER'] if app.config['SAVE_FACE_IMAGES'] else None)
+    
+    # Save the index to disk now and have the running workers reload their face data
+    if templates:
+        campus_index.rebuild(app.config['FACE_INDEX_PATH'], app.config['FACE_INDEX_BACKEND'],
+                             load_campus_encodings, face_index_fingerprint())
+        notify_face_change()
+    
+    if report_path:
+        with open(report_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['file', 'status', 'faces'])
+            writer.writerows(report)
+    for name, status, faces in report:
+        if status != face_enrollment.ENROLLED:
+            print(f"{name}: {status.replace('_', ' ')}" + (f" ({faces})" if faces > 1 else ''))
+    enrolled = sum(1 for _, status, _ in report if status == face_enrollment.ENROLLED)
+    print(f"Enrolled {enrolled} of {len(report)} photos for {len(templates)} students")
+
+@app.cli.command('check-attendance-locations')
+@click.option('--date', 'class_date', default=None, help='Only check this class date (YYYY-MM-DD)')
+def check_attendance_locations_command(class_date):
+    """Re-check recorded QR check-in locations against the current campus zones"""
+    geofence = get_geofence()
+    cursor = get_db_connection().cursor()
+    query = "SELECT id, student_id, subject_id, class_date, latitude, longitude FROM attendance WHERE latitude IS NOT NULL"
+    params = ()
+    if class_date:
+        query += " AND class_date = ?"
+        params = (class_date,)
+    cursor.execute(query, params)
+    
+    checked = outside = 0
+    while True:
+        rows = cursor.fetchmany(5000)
+        if not rows:
+            break
+        zones, distances = geofence.check_many([row['latitude'] for row in rows], [row['longitude'] for row in rows])
+        checked += len(rows)
+        for row, zone, distance in zip(rows, zones, distances):
+            if zone < 0:
+                outside += 1
+                where = f"is {int(distance)}m outside campus" if np.isfinite(distance) else "has an invalid location"
+                print(f"attendance {row['id']}: student {row['student_id']}, subject {row['subject_id']}, "
+                      f"{row['class_date']} {where}")
+    cursor.close()
+    print(f"Checked {checked} check-ins, {outside} outside the campus zones")
+
+@app.cli.command('rebuild-face-index')
+def rebuild_face_index_command():
+    """Rebuild the campus-wide face index from the database and save it to disk"""
+    index = campus_index.rebuild(app.config['FACE_INDEX_PATH'], app.config['FACE_INDEX_BACKEND'],
+                                 load_campus_encodings, face_index_fingerprint())
+    notify_face_change()
+    print(f"Indexed {len(index)} students ({index.kind}) in {app.config['FACE_INDEX_PATH']}")
+
 # ============================================================================
 # RUN APP
 # ============================================================================
 
 if __name__ == '__main__':
-    init_database()
+    with app.app_context():
+        init_database()
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,346 @@
+"""
+Camera Face Detection Pipeline
+Kantipur Engineering College - BCT 5th Semester
+
+Running HOG detection on every full-resolution camera frame caps the
+live feed at 2-3 FPS on CPU-only classroom PCs. Instead faces are
+detected on a downscaled copy every few frames, boxes are mapped back
+to full resolution, and in between they are carried along with sparse
+optical flow, which costs a fraction of a detection.
+
+Capture, detection and JPEG encoding run on their own threads joined by
+single-slot queues where the newest frame replaces a stale one, so a
+slow detection never stalls the stream (OpenCV and dlib release the GIL,
+so the stages really run on separate cores).
+
+The camera device is owned once per process by a CameraHub: every
+/video-feed viewer subscribes to the same pipeline, so detection cost
+does not grow with the number of viewers.
+"""
+
+import time
+import queue
+import threading
+import cv2
+import numpy as np
+import face_recognition
+
+# ============================================================================
+# FPS METER
+# ============================================================================
+
+class RateMeter:
+    """Exponential moving average of events per second"""
+
+    def __init__(self, smoothing=0.9):
+        self.smoothing = smoothing
+        self.rate = 0.0
+        self._last = None
+        self._lock = threading.Lock()
+
+    def tick(self):
+        now = time.perf_counter()
+        with self._lock:
+            if self._last is not None and now > self._last:
+                instant = 1.0 / (now - self._last)
+                self.rate = instant if self.rate == 0.0 else (
+                    self.smoothing * self.rate + (1.0 - self.smoothing) * instant)
+            self._last = now
+
+# ============================================================================
+# OPTICAL FLOW TRACKER
+# ============================================================================
+
+LK_PARAMS = dict(winSize=(15, 15), maxLevel=2,
+                 criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+
+class FaceTracker:
+    """Carries face boxes between detections by the median optical flow of corners inside each box"""
+
+    def __init__(self, max_points=20):
+        self.max_points = max_points
+        self.boxes = []
+        self._points = []
+        self._prev_gray = None
+
+    def reset(self, gray, boxes):
+        """Start tracking freshly detected (top, right, bottom, left) boxes"""
+        self.boxes = list(boxes)
+        self._points = []
+        for top, right, bottom, left in self.boxes:
+            mask = np.zeros_like(gray)
+            mask[max(top, 0):max(bottom, 0), max(left, 0):max(right, 0)] = 255
+            self._points.append(cv2.goodFeaturesToTrack(
+                gray, maxCorners=self.max_points, qualityLevel=0.01, minDistance=5, mask=mask))
+        self._prev_gray = gray
+
+    def update(self, gray):
+        """Shift every box by the flow measured since the previous frame"""
+        if self._prev_gray is None or not self.boxes:
+            self._prev_gray = gray
+            return self.boxes
+
+        height, width = gray.shape[:2]
+        for i, points in enumerate(self._points):
+            if points is None or len(points) == 0:
+                continue
+            moved, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, points, None, **LK_PARAMS)
+            good = status.reshape(-1) == 1
+            if good.sum() < 3:
+                continue
+            dx, dy = np.median((moved[good] - points[good]).reshape(-1, 2), axis=0)
+            top, right, bottom, left = self.boxes[i]
+            dx = int(round(min(max(dx, -left), width - right)))
+            dy = int(round(min(max(dy, -top), height - bottom)))
+            self.boxes[i] = (top + dy, right + dx, bottom + dy, left + dx)
+            self._points[i] = moved[good].reshape(-1, 1, 2)
+
+        self._prev_gray = gray
+        return self.boxes
+
+# ============================================================================
+# DETECTION PIPELINE
+# ============================================================================
+
+class DetectionPipeline:
+    """Downscaled detection settings, the tracker that carries boxes in between and their rates
+
+    ThreadedCameraPipeline decides which frames are detected and which are tracked.
+    """
+
+    def __init__(self, scale=0.25, detect_every=5):
+        self.scale = scale
+        self.detect_every = max(1, int(detect_every))
+        self.tracker = FaceTracker()
+        self.frame_rate = RateMeter()
+        self.detect_rate = RateMeter()
+
+    def detect(self, frame):
+        """Run HOG on a downscaled copy of a BGR frame, return boxes at full resolution"""
+        small = cv2.resize(frame, (0, 0), fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        rgb_small = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+        self.detect_rate.tick()
+        return [
+            tuple(int(round(value / self.scale)) for value in box)
+            for box in face_recognition.face_locations(rgb_small)
+        ]
+
+    def stats(self):
+        return {
+            'stream_fps': round(self.frame_rate.rate, 1),
+            'detect_fps': round(self.detect_rate.rate, 1),
+            'detect_scale': self.scale,
+            'detect_every': self.detect_every,
+        }
+
+def draw_overlay(frame, boxes, fps=None):
+    """Draw face boxes (and the stream FPS) onto a BGR frame in place"""
+    for top, right, bottom, left in boxes:
+        cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
+    if fps is not None:
+        cv2.putText(frame, f"{fps:.1f} FPS", (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+    return frame
+
+# ============================================================================
+# THREADED CAPTURE / DETECT / ENCODE PIPELINE
+# ============================================================================
+
+class LatestSlot:
+    """Single-item bounded queue: a new item replaces one the consumer hasn't taken yet"""
+
+    def __init__(self):
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=1)
+
+    def put(self, item):
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Block for the next item, raises queue.Empty on timeout"""
+        return self._queue.get(timeout=timeout)
+
+class ThreadedCameraPipeline:
+    """Capture thread -> detection worker -> encoder thread, fanned out to subscriber slots"""
+
+    def __init__(self, open_camera, scale=0.25, detect_every=5, jpeg_quality=80):
+        self.open_camera = open_camera
+        self.detection = DetectionPipeline(scale, detect_every)
+        self.jpeg_quality = jpeg_quality
+        self.capture_rate = RateMeter()
+        self._frames = LatestSlot()        # capture -> encoder, every frame
+        self._detect_input = LatestSlot()  # capture -> detector, every Nth frame
+        self._subscribers = set()          # encoder -> one slot per viewer, encoded JPEG
+        self._detections = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for target in (self._capture_loop, self._detect_loop, self._encode_loop):
+            thread = threading.Thread(target=target, name=f'camera-{target.__name__.strip("_")}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=2.0)
+        self._threads = []
+
+    @property
+    def stopped(self):
+        return self._stop.is_set()
+
+    def _capture_loop(self):
+        camera = self.open_camera()
+        count = 0
+        try:
+            while not self._stop.is_set():
+                success, frame = camera.read()
+                if not success:
+                    break
+                frame = cv2.flip(frame, 1)
+                self.capture_rate.tick()
+                self._frames.put(frame)
+                if count % self.detection.detect_every == 0:
+                    self._detect_input.put(frame)
+                count += 1
+        finally:
+            camera.release()
+            self._stop.set()
+
+    def _detect_loop(self):
+        while not self._stop.is_set():
+            try:
+                frame = self._detect_input.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            boxes = self.detection.detect(frame)
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            with self._lock:
+                self._detections = (gray, boxes)
+
+    def _encode_loop(self):
+        tracker = self.detection.tracker
+        params = [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality]
+        while not self._stop.is_set():
+            try:
+                frame = self._frames.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            with self._lock:
+                detections, self._detections = self._detections, None
+            if detections is not None:
+                # Start from the detector's frame and flow the boxes forward to this one
+                tracker.reset(*detections)
+            boxes = tracker.update(gray)
+            
+            # The detector may still be reading this frame, so draw on a copy
+            frame = draw_overlay(frame.copy(), boxes, self.detection.frame_rate.rate)
+            success, buffer = cv2.imencode('.jpg', frame, params)
+            if success:
+                self.detection.frame_rate.tick()
+                self._publish(buffer.tobytes())
+
+    def _publish(self, jpeg):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for slot in subscribers:
+            slot.put(jpeg)
+
+    def subscribe(self):
+        """Register a viewer and return the slot its frames arrive in"""
+        slot = LatestSlot()
+        with self._lock:
+            self._subscribers.add(slot)
+        return slot
+
+    def unsubscribe(self, slot):
+        with self._lock:
+            self._subscribers.discard(slot)
+
+    def frames(self, slot):
+        """Yield encoded JPEG frames from a subscriber slot until the camera stops"""
+        while True:
+            try:
+                yield slot.get(timeout=1.0)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+
+    def stats(self):
+        stats = self.detection.stats()
+        stats.update({
+            'capture_fps': round(self.capture_rate.rate, 1),
+            'dropped_frames': self._frames.dropped,
+            'dropped_detections': self._detect_input.dropped,
+            'dropped_encoded': sum(slot.dropped for slot in list(self._subscribers)),
+        })
+        return stats
+
+# ============================================================================
+# SHARED CAMERA HUB
+# ============================================================================
+
+class CameraHub:
+    """Owns the camera once per process and fans encoded frames out to every viewer"""
+
+    def __init__(self, create_pipeline):
+        self.create_pipeline = create_pipeline
+        self._pipeline = None
+        # Viewers per pipeline: a replaced pipeline can still have viewers draining
+        self._viewers = {}
+        self._lock = threading.Lock()
+
+    @property
+    def viewers(self):
+        """Viewers of the current pipeline"""
+        with self._lock:
+            return self._viewers.get(self._pipeline, 0)
+
+    def _subscribe(self):
+        with self._lock:
+            # Start the camera for the first viewer, or again if it stopped on a read failure
+            if self._pipeline is None or self._pipeline.stopped:
+                self._pipeline = self.create_pipeline().start()
+            pipeline = self._pipeline
+            self._viewers[pipeline] = self._viewers.get(pipeline, 0) + 1
+            return pipeline, pipeline.subscribe()
+
+    def _unsubscribe(self, pipeline, slot):
+        with self._lock:
+            pipeline.unsubscribe(slot)
+            self._viewers[pipeline] -= 1
+            if self._viewers[pipeline] > 0:
+                return
+            del self._viewers[pipeline]
+            # Release the device as soon as the last viewer of this pipeline disconnects
+            if self._pipeline is pipeline:
+                self._pipeline = None
+            pipeline.stop()
+
+    def stream(self):
+        """Yield encoded JPEG frames for one viewer"""
+        pipeline, slot = self._subscribe()
+        try:
+            yield from pipeline.frames(slot)
+        finally:
+            self._unsubscribe(pipeline, slot)
+
+    def stats(self):
+        pipeline = self._pipeline
+        if pipeline is None:
+            return {'active': False, 'viewers': 0}
+        return dict(active=True, viewers=self.viewers, **pipeline.stats())
@@ -0,0 +1,107 @@
+"""
+QR Check-in Cache
+Kantipur Engineering College - BCT 5th Semester
+
+During the check-in burst every scan needs the same few facts: which
+student the logged-in user is, and the subject, section and expiry of
+the session being scanned. Both are kept in memory so the request only
+writes the attendance row.
+
+Several worker processes each hold their own copy. When a session is
+replaced or a student removed, the process that made the change drops
+its entries and bumps a signal file; the others notice the file changed
+(one stat call, no database read) and clear their caches.
+"""
+
+import os
+import time
+import uuid
+import threading
+
+class InvalidationSignal:
+    """A file whose identity changes every time bump() is called, shared by all workers"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def version(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        # os.replace gives a new inode each bump, so coarse mtimes don't hide a change
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def bump(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(uuid.uuid4().hex)
+        os.replace(tmp_path, self.path)
+
+class CheckinCache:
+    """Active QR sessions by session_code and user_id -> student, cleared on a signal change"""
+
+    def __init__(self, signal=None):
+        self.signal = signal
+        self._sessions = {}
+        self._students = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _sync(self):
+        # Caller holds the lock
+        if self.signal is None:
+            return
+        version = self.signal.version()
+        if version != self._version:
+            self._sessions.clear()
+            self._students.clear()
+            self._version = version
+
+    def put_session(self, session_code, entry):
+        """Cache a session dict, its 'expires_at' is a UNIX timestamp"""
+        with self._lock:
+            self._sync()
+            now = time.time()
+            for code in [code for code, cached in self._sessions.items() if cached['expires_at'] <= now]:
+                del self._sessions[code]
+            self._sessions[session_code] = entry
+
+    def get_session(self, session_code, loader):
+        """Return the active session, calling loader(session_code) on a miss; None if unknown or expired"""
+        with self._lock:
+            self._sync()
+            entry = self._sessions.get(session_code)
+            if entry is not None:
+                if entry['expires_at'] > time.time():
+                    return entry
+                del self._sessions[session_code]
+                return None
+        entry = loader(session_code)
+        if entry is not None:
+            self.put_session(session_code, entry)
+        return entry
+
+    def get_student(self, user_id, loader):
+        """Return the student dict for a user, calling loader(user_id) on a miss; misses are not cached"""
+        with self._lock:
+            self._sync()
+            entry = self._students.get(user_id)
+        if entry is None:
+            entry = loader(user_id)
+            if entry is not None:
+                with self._lock:
+                    self._students[user_id] = entry
+        return entry
+
+    def invalidate(self, session_codes=(), user_ids=()):
+        """Drop entries here and tell the other workers to clear theirs"""
+        with self._lock:
+            for code in session_codes:
+                self._sessions.pop(code, None)
+            for user_id in user_ids:
+                self._students.pop(user_id, None)
+            if self.signal is not None:
+                self.signal.bump()
+                self._version = self.signal.version()
@@ -0,0 +1,166 @@
+"""
+SQLite Connection Pool and Write Queue
+Kantipur Engineering College - BCT 5th Semester
+
+Opening a fresh sqlite3 connection for every statement costs an open/close
+and re-runs connection setup each time. Connections are instead kept in a
+small pool, configured once with the PRAGMAs when they are created, and a
+request borrows one for its whole app context.
+
+Attendance inserts arrive in bursts (a whole class scanning the same QR
+code within a minute). Rather than every request taking the write lock
+and syncing its own commit, they are queued to a single writer thread
+that applies whatever has accumulated in one transaction (group commit)
+while readers keep going against the WAL.
+"""
+
+import time
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+class ConnectionPool:
+    """Keeps up to max_idle configured connections to one SQLite database for reuse"""
+
+    def __init__(self, path, pragmas=None, max_idle=8, timeout=30.0):
+        self.path = path
+        self.pragmas = dict(pragmas or {})
+        # sqlite3.connect(timeout=) sets the busy timeout, a PRAGMA would silently override it
+        if 'busy_timeout' in self.pragmas:
+            raise ValueError("Set the lock wait with timeout=, not PRAGMA busy_timeout")
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=max_idle)
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    def connect(self):
+        """Open a new connection with the row factory and PRAGMAs applied"""
+        # Connections move between request threads, each is only used by one at a time
+        conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        with self._lock:
+            self.opened += 1
+        return conn
+
+    def acquire(self):
+        """Borrow an idle connection, opening a new one if none is free"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self.connect()
+
+    def release(self, conn):
+        """Return a connection to the pool, rolling back anything left uncommitted"""
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+# ============================================================================
+# SCHEMA MIGRATIONS
+# ============================================================================
+
+def migrate_schema(conn, migrations):
+    """Apply the migrations newer than PRAGMA user_version, each in its own transaction
+
+    migrations is an ordered list of functions taking the connection; the
+    database remembers how many have run, so each one runs exactly once.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    applied = []
+    for number, migration in enumerate(migrations, start=1):
+        if number <= version:
+            continue
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(migration.__name__)
+    return applied
+
+def column_names(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+# ============================================================================
+# SINGLE WRITER WITH GROUP COMMIT
+# ============================================================================
+
+class BatchWriter:
+    """Dedicated thread that applies queued writes in batched transactions"""
+
+    def __init__(self, pool, max_batch=200, max_delay=0.005):
+        self.pool = pool
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.batches = 0
+        self.writes = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, query, params=(), many=False):
+        """Queue a write, the Future resolves to its rowcount once the batch is committed"""
+        future = Future()
+        self._queue.put((query, params, many, future))
+        return future
+
+    def execute(self, query, params=(), many=False, timeout=10.0):
+        """Queue a write and wait for its commit, return the rowcount"""
+        return self.submit(query, params, many).result(timeout=timeout)
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        conn = self.pool.connect()
+        while True:
+            batch = self._next_batch()
+            results = []
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                for query, params, many, future in batch:
+                    try:
+                        cursor = conn.executemany(query, params) if many else conn.execute(query, params)
+                        results.append((future, cursor.rowcount, None))
+                    except sqlite3.DatabaseError as e:
+                        # A failed statement is rolled back on its own, the rest of the batch still commits
+                        results.append((future, None, e))
+                conn.commit()
+            except sqlite3.Error as e:
+                if conn.in_transaction:
+                    conn.rollback()
+                results = [(future, None, e) for _, _, _, future in batch]
+            
+            self.batches += 1
+            self.writes += len(batch)
+            for future, rowcount, error in results:
+                if error is None:
+                    future.set_result(rowcount)
+                else:
+                    future.set_exception(error)
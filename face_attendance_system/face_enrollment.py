@@ -0,0 +1,193 @@
+"""
+Bulk Face Enrollment
+Kantipur Engineering College - BCT 5th Semester
+
+Enrolls a whole batch from ID-card photos instead of one student at a
+time at the webcam. Photos come from a folder or a ZIP and are named
+after the student ID (080BCT005.jpg, or 080BCT005_2.jpg for extra
+photos of the same student).
+
+Detection and encoding dominate the cost and are independent per photo,
+so they run on a process pool across every core. Workers read the photo
+themselves (only the file name crosses the process boundary) and send
+back a 516-byte encoding. When a save folder is given they also copy the
+enrolled photo there, as the webcam capture does, so image paths always
+point at a real file. The parent writes the results in batched
+transactions and reports every photo with zero or several faces.
+"""
+
+import os
+import zipfile
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+import face_recognition
+from werkzeug.utils import secure_filename
+from face_gallery import encode_encoding, decode_encodings, build_template
+from image_io import decode_image_bytes
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+ENROLLED = 'enrolled'
+NO_FACE = 'no_face'
+MULTIPLE_FACES = 'multiple_faces'
+UNREADABLE = 'unreadable'
+UNKNOWN_STUDENT = 'unknown_student'
+
+def encode_faces(rgb_image, max_width):
+    """Detect every face on a downscaled copy and encode them at full resolution"""
+    height, width = rgb_image.shape[:2]
+    scale = min(1.0, max_width / width)
+
+    if scale < 1.0:
+        small = cv2.resize(rgb_image, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        locations = [
+            (int(top / scale), min(int(right / scale), width), min(int(bottom / scale), height), int(left / scale))
+            for top, right, bottom, left in face_recognition.face_locations(small)
+        ]
+    else:
+        locations = face_recognition.face_locations(rgb_image)
+
+    if not locations:
+        return []
+    return face_recognition.face_encodings(rgb_image, locations)
+
+# ============================================================================
+# PHOTO SOURCES
+# ============================================================================
+
+def list_photos(source):
+    """Image file names in a folder (recursively) or a ZIP, sorted"""
+    if os.path.isdir(source):
+        names = [
+            os.path.relpath(os.path.join(root, name), source)
+            for root, _, files in os.walk(source) for name in files
+        ]
+    else:
+        with zipfile.ZipFile(source) as archive:
+            names = [info.filename for info in archive.infolist() if not info.is_dir()]
+    return sorted(name for name in names
+                  if name.lower().endswith(IMAGE_EXTENSIONS) and not os.path.basename(name).startswith('.'))
+
+def student_code(name):
+    """Student ID a photo belongs to: the file name up to the extension or first underscore"""
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return stem.split('_')[0].strip().upper()
+
+# Each worker process keeps the ZIP open across its tasks
+_archives = {}
+
+def _read_photo(source, name):
+    if os.path.isdir(source):
+        with open(os.path.join(source, name), 'rb') as f:
+            return f.read()
+    if source not in _archives:
+        _archives[source] = zipfile.ZipFile(source)
+    return _archives[source].read(name)
+
+def _init_worker():
+    # One process per core already, OpenCV's own thread pool would only oversubscribe
+    cv2.setNumThreads(1)
+
+def saved_photo_path(save_dir, stamp, name):
+    """Where an enrolled photo is copied: one flat file per source name, e.g. enroll_<stamp>_photos_080BCT005.jpg"""
+    return os.path.join(save_dir, secure_filename(f"enroll_{stamp}_{name.replace('/', '_')}"))
+
+def encode_photo(task):
+    """Worker: (source, name, max_width, save path or None) -> (name, status, encoding bytes or None, face count, path)"""
+    source, name, max_width, save_path = task
+    try:
+        image_bytes = _read_photo(source, name)
+        rgb = decode_image_bytes(image_bytes)
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        return name, UNREADABLE, None, 0, None
+    encodings = encode_faces(rgb, max_width)
+    if len(encodings) == 0:
+        return name, NO_FACE, None, 0, None
+    if len(encodings) > 1:
+        return name, MULTIPLE_FACES, None, len(encodings), None
+    if save_path:
+        with open(save_path, 'wb') as f:
+            f.write(image_bytes)
+    return name, ENROLLED, encode_encoding(encodings[0]), 1, save_path
+
+# ============================================================================
+# BATCHED WRITES
+# ============================================================================
+
+def store_batch(conn, samples, max_samples, replace=False, replaced=None):
+    """Insert (student id, encoding blob, image path or None) samples and rebuild the affected templates
+
+    Returns {student id: template}. With replace, a student's existing samples
+    are dropped the first time they appear (tracked in the replaced set).
+    """
+    student_ids = sorted({student_id for student_id, _, _ in samples})
+    replaced = set() if replaced is None else replaced
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if replace:
+            fresh = [student_id for student_id in student_ids if student_id not in replaced]
+            conn.executemany("DELETE FROM face_sample WHERE student_id = ?", [(sid,) for sid in fresh])
+            replaced.update(fresh)
+        conn.executemany("INSERT INTO face_sample (student_id, encoding, image_path) VALUES (?, ?, ?)", samples)
+        conn.executemany("""
+            DELETE FROM face_sample
+            WHERE student_id = ? AND id NOT IN (
+                SELECT id FROM face_sample WHERE student_id = ? ORDER BY id DESC LIMIT ?
+            )
+        """, [(sid, sid, max_samples) for sid in student_ids])
+
+        placeholders = ','.join('?' * len(student_ids))
+        rows = conn.execute(
+            f"SELECT student_id, encoding FROM face_sample WHERE student_id IN ({placeholders}) ORDER BY student_id",
+            student_ids
+        ).fetchall()
+        blobs = {}
+        for row in rows:
+            blobs.setdefault(row['student_id'], []).append(row['encoding'])
+        templates = {sid: build_template(decode_encodings(student_blobs)) for sid, student_blobs in blobs.items()}
+        last_path = {student_id: path for student_id, _, path in samples}
+        conn.executemany(
+            "UPDATE student SET face_encoding = ?, face_image_path = COALESCE(?, face_image_path) WHERE id = ?",
+            [(encode_encoding(template), last_path[sid], sid) for sid, template in templates.items()]
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return templates
+
+def enroll_photos(conn, source, max_width=640, max_samples=10, replace=False, workers=None, batch_size=200,
+                  save_dir=None):
+    """Enroll every photo of a folder or ZIP, return ([(name, status, face count)], {student id: template})
+
+    Enrolled photos are copied into save_dir and their copies recorded as
+    the image paths; without save_dir the samples have no image path.
+    """
+    students = {row['student_id'].upper(): row['id'] for row in conn.execute("SELECT id, student_id FROM student")}
+    if conn.in_transaction:
+        conn.commit()
+
+    if save_dir:
+        os.makedirs(save_dir, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d%H%M%S')
+    report, tasks = [], []
+    for name in list_photos(source):
+        if student_code(name) in students:
+            tasks.append((source, name, max_width, saved_photo_path(save_dir, stamp, name) if save_dir else None))
+        else:
+            report.append((name, UNKNOWN_STUDENT, 0))
+
+    templates, batch, replaced = {}, [], set()
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for name, status, encoding, faces, path in pool.map(encode_photo, tasks, chunksize=4):
+            report.append((name, status, faces))
+            if status == ENROLLED:
+                batch.append((students[student_code(name)], encoding, path))
+            if len(batch) >= batch_size:
+                templates.update(store_batch(conn, batch, max_samples, replace, replaced))
+                batch = []
+    if batch:
+        templates.update(store_batch(conn, batch, max_samples, replace, replaced))
+    return report, templates
@@ -0,0 +1,267 @@
+"""
+Face Encoding Gallery
+Kantipur Engineering College - BCT 5th Semester
+
+Keeps the enrolled face encodings of a section resident in memory as one
+contiguous float32 matrix, so a probe face (or a whole classroom of them)
+is matched with a single batched distance computation instead of a
+Python loop over face_recognition.compare_faces.
+"""
+
+import pickle
+import struct
+import threading
+from collections import OrderedDict
+import numpy as np
+
+ENCODING_SIZE = 128
+FACE_MATCH_TOLERANCE = 0.6  # same default as face_recognition.compare_faces
+SAMPLE_FALLBACK_MARGIN = 0.08  # template distances this close to the tolerance are re-checked per sample
+
+# ============================================================================
+# STORAGE FORMAT
+# ============================================================================
+# A stored encoding is a 4 byte header (b'FE', format version, reserved)
+# followed by 128 little-endian float32 values: 516 bytes instead of ~1 KB
+# of pickled float64, and a whole section can be read with one np.frombuffer.
+
+ENCODING_MAGIC = b'FE'
+ENCODING_VERSION = 1
+ENCODING_HEADER = struct.Struct('<2sBx')
+ENCODING_BYTES = ENCODING_HEADER.size + ENCODING_SIZE * 4
+ENCODING_RECORD = np.dtype([
+    ('magic', 'S2'),
+    ('version', 'u1'),
+    ('reserved', 'u1'),
+    ('vector', '<f4', (ENCODING_SIZE,)),
+])
+
+def encode_encoding(encoding):
+    """Pack a 128-d encoding into the compact storage format"""
+    vector = np.asarray(encoding, dtype='<f4').reshape(ENCODING_SIZE)
+    return ENCODING_HEADER.pack(ENCODING_MAGIC, ENCODING_VERSION) + vector.tobytes()
+
+def is_compact_encoding(blob):
+    return len(blob) == ENCODING_BYTES and blob[:2] == ENCODING_MAGIC
+
+def decode_encoding(blob):
+    """Turn a stored face_encoding BLOB back into a float32 vector"""
+    return decode_encodings([blob])[0]
+
+def decode_encodings(blobs):
+    """Decode many stored encodings into one (N, 128) float32 matrix with a single frombuffer"""
+    data = b''.join(blobs)
+    if len(data) != len(blobs) * ENCODING_BYTES:
+        raise ValueError('Unrecognised face encoding format, run the migrate-encodings command')
+    records = np.frombuffer(data, dtype=ENCODING_RECORD)
+    if not (np.all(records['magic'] == ENCODING_MAGIC) and np.all(records['version'] == ENCODING_VERSION)):
+        raise ValueError('Unrecognised face encoding format, run the migrate-encodings command')
+    return np.ascontiguousarray(records['vector'], dtype=np.float32)
+
+def decode_legacy_encoding(blob):
+    """Read an encoding written by older versions with pickle.dumps (migration only)"""
+    return np.asarray(pickle.loads(blob), dtype=np.float32)
+
+def migrate_legacy_encodings(conn):
+    """Rewrite every pickled student.face_encoding in the compact format, return the row count"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT id, face_encoding FROM student
+        WHERE face_encoding IS NOT NULL AND substr(face_encoding, 1, 2) != X'4645'
+    """)
+    rows = [
+        (encode_encoding(decode_legacy_encoding(row[1])), row[0])
+        for row in cursor.fetchall() if row[1]
+    ]
+    cursor.executemany("UPDATE student SET face_encoding = ? WHERE id = ?", rows)
+    conn.commit()
+    cursor.close()
+    return len(rows)
+
+# ============================================================================
+# GALLERY
+# ============================================================================
+
+def pairwise_distances(probes, matrix, sq_norms):
+    """Euclidean distance from every probe to every row of matrix, shape (P, N)"""
+    probe_sq = np.einsum('ij,ij->i', probes, probes)
+    d2 = probe_sq[:, None] + sq_norms[None, :] - 2.0 * (probes @ matrix.T)
+    np.maximum(d2, 0.0, out=d2)
+    return np.sqrt(d2, out=d2)
+
+class FaceGallery:
+    """All templates of one section as a (N, 128) float32 matrix plus an id array
+
+    Students enrolled with several samples also keep them in a second
+    matrix, grouped by student, which is only consulted for probes whose
+    template distance lands near the match threshold.
+    """
+
+    def __init__(self, student_ids, encodings, sample_ids=None, sample_encodings=None):
+        self.student_ids = np.asarray(student_ids, dtype=np.int64)
+        self.encodings = np.ascontiguousarray(encodings, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+        # Squared norms are cached so each match is a single matrix product
+        self.sq_norms = np.einsum('ij,ij->i', self.encodings, self.encodings)
+        self._set_samples(sample_ids, sample_encodings)
+
+    def _set_samples(self, sample_ids, sample_encodings):
+        self.sample_encodings = np.empty((0, ENCODING_SIZE), dtype=np.float32)
+        self.sample_starts = np.empty(0, dtype=np.int64)
+        self.sample_columns = np.empty(0, dtype=np.int64)
+        if sample_ids is None or len(sample_ids) == 0:
+            return
+        
+        # Keep only samples of students in the gallery, grouped by template column
+        column_of = {student_id: column for column, student_id in enumerate(self.student_ids.tolist())}
+        columns = np.array([column_of.get(int(student_id), -1) for student_id in sample_ids], dtype=np.int64)
+        keep = columns >= 0
+        columns = columns[keep]
+        order = np.argsort(columns, kind='stable')
+        columns = columns[order]
+        
+        self.sample_encodings = np.ascontiguousarray(
+            np.asarray(sample_encodings, dtype=np.float32).reshape(-1, ENCODING_SIZE)[keep][order])
+        self.sample_columns, self.sample_starts = np.unique(columns, return_index=True)
+        self.sample_sq_norms = np.einsum('ij,ij->i', self.sample_encodings, self.sample_encodings)
+
+    def __len__(self):
+        return len(self.student_ids)
+
+    def distances(self, probes):
+        """Euclidean distance from every probe to every enrolled template, shape (P, N)"""
+        probes = np.asarray(probes, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+        return pairwise_distances(probes, self.encodings, self.sq_norms)
+
+    def refine(self, probes, dist, tolerance):
+        """Replace template distances by per-sample minimums for near-threshold probes"""
+        if len(self.sample_encodings) == 0:
+            return dist
+        near = np.abs(dist.min(axis=1) - tolerance) <= SAMPLE_FALLBACK_MARGIN
+        if not near.any():
+            return dist
+        
+        sample_dist = pairwise_distances(probes[near], self.sample_encodings, self.sample_sq_norms)
+        per_student = np.minimum.reduceat(sample_dist, self.sample_starts, axis=1)
+        refined = dist[near]
+        refined[:, self.sample_columns] = np.minimum(refined[:, self.sample_columns], per_student)
+        dist[near] = refined
+        return dist
+
+    def match(self, probes, tolerance=FACE_MATCH_TOLERANCE):
+        """Return a (student_id, distance) pair per probe; student_id is None when nothing is close enough"""
+        probes = np.asarray(probes, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+        if len(self) == 0 or len(probes) == 0:
+            return [(None, None) for _ in range(len(probes))]
+
+        dist = self.refine(probes, self.distances(probes), tolerance)
+        best = dist.argmin(axis=1)
+        best_dist = dist[np.arange(len(probes)), best]
+
+        results = []
+        for idx, d in zip(best, best_dist):
+            if d <= tolerance:
+                results.append((int(self.student_ids[idx]), float(d)))
+            else:
+                results.append((None, float(d)))
+        return results
+
+    def identify(self, probes, tolerance=FACE_MATCH_TOLERANCE):
+        """Match a whole crowd of probes; each student is claimed by at most one (the closest) face"""
+        best = {}
+        for student_id, distance in self.match(probes, tolerance):
+            if student_id is not None and (student_id not in best or distance < best[student_id]):
+                best[student_id] = distance
+        return best
+
+# ============================================================================
+# SECTION GALLERY CACHE
+# ============================================================================
+
+def build_gallery(rows, sample_rows=()):
+    """Build a FaceGallery from (student_id, template) rows and optional (student_id, sample) rows"""
+    rows = [row for row in rows if row[1]]
+    if not rows:
+        return FaceGallery(np.empty(0), np.empty((0, ENCODING_SIZE)))
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    sample_rows = [row for row in sample_rows if row[1]]
+    sample_ids = [row[0] for row in sample_rows]
+    samples = decode_encodings([row[1] for row in sample_rows]) if sample_rows else None
+    return FaceGallery(ids, decode_encodings([row[1] for row in rows]), sample_ids, samples)
+
+def build_template(samples):
+    """Aggregate a student's samples into the single template matched first"""
+    samples = np.asarray(samples, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+    return samples.mean(axis=0)
+
+class GalleryCache:
+    """Process-wide cache of one FaceGallery per section, loaded on first use"""
+
+    def __init__(self):
+        self._galleries = {}
+        self._lock = threading.Lock()
+
+    def get(self, section_id, loader):
+        """Return the section's gallery, calling loader(section_id) -> (rows, sample_rows) if it isn't resident"""
+        section_id = int(section_id)
+        gallery = self._galleries.get(section_id)
+        if gallery is not None:
+            return gallery
+        with self._lock:
+            gallery = self._galleries.get(section_id)
+            if gallery is None:
+                gallery = build_gallery(*loader(section_id))
+                self._galleries[section_id] = gallery
+        return gallery
+
+    def invalidate(self, section_id=None):
+        """Drop one section's gallery (or all of them) so the next lookup reloads it"""
+        with self._lock:
+            if section_id is None:
+                self._galleries.clear()
+            else:
+                self._galleries.pop(int(section_id), None)
+
+# ============================================================================
+# PER-STUDENT ENCODING CACHE (1:1 VERIFICATION)
+# ============================================================================
+
+class EncodingCache:
+    """Bounded LRU of single-student encodings so 1:1 verification skips the database"""
+
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        """Return the cached value for key, calling loader(key) on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        value = loader(key)
+        with self._lock:
+            self._entries[key] = value
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key=None):
+        """Drop one entry (or everything) so the next lookup reloads it"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+def verify(probes, encodings, tolerance=FACE_MATCH_TOLERANCE):
+    """Compare probes against one student's template (and samples), return (matched, best distance)"""
+    probes = np.asarray(probes, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+    if encodings is None or len(probes) == 0:
+        return False, None
+    encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+    distance = float(np.linalg.norm(probes[:, None, :] - encodings[None, :, :], axis=2).min())
+    return distance <= tolerance, distance
+
+gallery_cache = GalleryCache()
+encoding_cache = EncodingCache()
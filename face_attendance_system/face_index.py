@@ -0,0 +1,324 @@
+"""
+Campus-wide Face Index
+Kantipur Engineering College - BCT 5th Semester
+
+1:N identification against every enrolled student of the college (open
+gate, library check-in). Two interchangeable backends share one interface:
+
+- ExactIndex: brute-force NumPy search over the whole gallery
+- IVFIndex: inverted-file index, vectors are bucketed by their nearest
+  k-means centroid and a search only scans the nprobe closest buckets
+
+Both support incremental add/remove and are saved to a single .npz file
+so a restart does not rebuild them. The file records a fingerprint of the
+face data it was built from; when the database has moved on (another
+worker enrolled or deleted a student) the index is rebuilt instead.
+"""
+
+import os
+import threading
+import numpy as np
+from face_gallery import ENCODING_SIZE, FACE_MATCH_TOLERANCE, pairwise_distances
+
+# ============================================================================
+# EXACT (BRUTE FORCE) BACKEND
+# ============================================================================
+
+class ExactIndex:
+    """Brute-force search over every stored vector"""
+
+    kind = 'exact'
+
+    def __init__(self):
+        self.fingerprint = None  # state of the face data the vectors were built from
+        self.ids = np.empty(0, dtype=np.int64)
+        self.vectors = np.empty((0, ENCODING_SIZE), dtype=np.float32)
+        self.sq_norms = np.empty(0, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, ids, vectors):
+        """Insert vectors, replacing any already stored under the same ids"""
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+        self.remove(ids)
+        self.ids = np.concatenate([self.ids, ids])
+        self.vectors = np.concatenate([self.vectors, vectors])
+        self.sq_norms = np.concatenate([self.sq_norms, np.einsum('ij,ij->i', vectors, vectors)])
+        return ids
+
+    def remove(self, ids):
+        """Delete the vectors stored under ids, unknown ids are ignored"""
+        keep = ~np.isin(self.ids, np.asarray(ids, dtype=np.int64).reshape(-1))
+        if not keep.all():
+            self._select(keep)
+
+    def _select(self, keep):
+        self.ids = self.ids[keep]
+        self.vectors = self.vectors[keep]
+        self.sq_norms = self.sq_norms[keep]
+
+    def search(self, probes, tolerance=FACE_MATCH_TOLERANCE):
+        """Return a (id, distance) pair per probe; id is None when nothing is close enough"""
+        probes = np.asarray(probes, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+        if len(self) == 0:
+            return [(None, None) for _ in range(len(probes))]
+        dist = pairwise_distances(probes, self.vectors, self.sq_norms)
+        best = dist.argmin(axis=1)
+        return [self._result(row, dist[i, row], tolerance) for i, row in enumerate(best)]
+
+    def _result(self, row, distance, tolerance):
+        distance = float(distance)
+        return (int(self.ids[row]) if distance <= tolerance else None, distance)
+
+    def _state(self):
+        return {'ids': self.ids, 'vectors': self.vectors}
+
+    def _restore(self, state):
+        self.ids = state['ids'].astype(np.int64)
+        self.vectors = np.ascontiguousarray(state['vectors'], dtype=np.float32)
+        self.sq_norms = np.einsum('ij,ij->i', self.vectors, self.vectors)
+
+# ============================================================================
+# APPROXIMATE (IVF) BACKEND
+# ============================================================================
+
+def kmeans(vectors, k, iterations=10, seed=0):
+    """Plain Lloyd's k-means, returns the (k, 128) centroid matrix"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = pairwise_distances(vectors, centroids, np.einsum('ij,ij->i', centroids, centroids)).argmin(axis=1)
+        counts = np.bincount(assign, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+    return centroids
+
+class IVFIndex(ExactIndex):
+    """Inverted-file index: only the vectors in the nprobe nearest buckets are compared"""
+
+    kind = 'ivf'
+
+    def __init__(self, nlist=128, nprobe=8):
+        super().__init__()
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.centroids = np.empty((0, ENCODING_SIZE), dtype=np.float32)
+        self.assign = np.empty(0, dtype=np.int64)
+        self._layout = None
+
+    def train(self, vectors=None):
+        """Learn the bucket centroids (from the stored vectors by default) and re-bucket everything"""
+        vectors = self.vectors if vectors is None else np.asarray(vectors, dtype=np.float32)
+        self._layout = None
+        # Too few vectors to be worth bucketing: stay untrained and search exhaustively
+        if len(vectors) < self.nlist * 4:
+            self.centroids = np.empty((0, ENCODING_SIZE), dtype=np.float32)
+            self.assign = np.zeros(len(self.ids), dtype=np.int64)
+            return
+        self.centroids = kmeans(vectors, self.nlist)
+        self.centroid_sq_norms = np.einsum('ij,ij->i', self.centroids, self.centroids)
+        self.assign = self._bucket(self.vectors)
+
+    def _bucket(self, vectors):
+        if len(self.centroids) == 0 or len(vectors) == 0:
+            return np.zeros(len(vectors), dtype=np.int64)
+        return pairwise_distances(vectors, self.centroids, self.centroid_sq_norms).argmin(axis=1)
+
+    def add(self, ids, vectors):
+        ids = super().add(ids, vectors)
+        new_assign = self._bucket(self.vectors[len(self.ids) - len(ids):])
+        self.assign = np.concatenate([self.assign, new_assign])
+        self._layout = None
+        if len(self.centroids) == 0 and len(self.ids) >= self.nlist * 4:
+            self.train()
+        return ids
+
+    def _select(self, keep):
+        super()._select(keep)
+        self.assign = self.assign[keep]
+        self._layout = None
+
+    def _bucket_layout(self):
+        """Vectors sorted by bucket so each bucket is one contiguous slice, rebuilt lazily after changes"""
+        if self._layout is None:
+            order = np.argsort(self.assign, kind='stable')
+            bounds = np.searchsorted(self.assign[order], np.arange(len(self.centroids) + 1))
+            self._layout = (order, np.ascontiguousarray(self.vectors[order]), self.sq_norms[order], bounds)
+        return self._layout
+
+    def search(self, probes, tolerance=FACE_MATCH_TOLERANCE):
+        if len(self.centroids) == 0:
+            return super().search(probes, tolerance)
+        probes = np.asarray(probes, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+        order, vectors, sq_norms, bounds = self._bucket_layout()
+        nprobe = min(self.nprobe, len(self.centroids))
+        nearest = np.argpartition(pairwise_distances(probes, self.centroids, self.centroid_sq_norms),
+                                  nprobe - 1, axis=1)[:, :nprobe]
+
+        results = []
+        for probe, buckets in zip(probes, nearest):
+            best_row, best_dist = None, np.inf
+            for bucket in buckets:
+                start, end = bounds[bucket], bounds[bucket + 1]
+                if start == end:
+                    continue
+                dist = pairwise_distances(probe[None, :], vectors[start:end], sq_norms[start:end])[0]
+                local = int(dist.argmin())
+                if dist[local] < best_dist:
+                    best_row, best_dist = order[start + local], dist[local]
+            results.append((None, None) if best_row is None else self._result(best_row, best_dist, tolerance))
+        return results
+
+    def _state(self):
+        state = super()._state()
+        state.update({'centroids': self.centroids, 'assign': self.assign,
+                      'nlist': self.nlist, 'nprobe': self.nprobe})
+        return state
+
+    def _restore(self, state):
+        super()._restore(state)
+        self.nlist = int(state['nlist'])
+        self.nprobe = int(state['nprobe'])
+        self.centroids = np.ascontiguousarray(state['centroids'], dtype=np.float32)
+        self.centroid_sq_norms = np.einsum('ij,ij->i', self.centroids, self.centroids)
+        self.assign = state['assign'].astype(np.int64)
+        self._layout = None
+
+BACKENDS = {
+    ExactIndex.kind: ExactIndex,
+    IVFIndex.kind: IVFIndex,
+}
+
+def create_index(kind='exact', **options):
+    """Create an empty index of the given backend"""
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown face index backend '{kind}', expected one of {sorted(BACKENDS)}")
+    return BACKENDS[kind](**options)
+
+# ============================================================================
+# PERSISTENCE
+# ============================================================================
+
+def save_index(index, path):
+    """Write the index and its fingerprint to a .npz file atomically"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path, kind=index.kind, fingerprint=index.fingerprint or '', **index._state())
+    os.replace(tmp_path, path)
+
+def load_index(path):
+    """Read an index written by save_index"""
+    with np.load(path, allow_pickle=False) as state:
+        index = create_index(str(state['kind']))
+        index._restore(state)
+        if 'fingerprint' in state.files:
+            index.fingerprint = str(state['fingerprint']) or None
+    return index
+
+# ============================================================================
+# SHARED CAMPUS INDEX
+# ============================================================================
+
+class CampusIndex:
+    """Thread-safe process-wide index, loaded from disk or built on first use and saved after changes"""
+
+    def __init__(self, save_delay=5.0):
+        self.save_delay = save_delay
+        self._index = None
+        self._path = None
+        self._lock = threading.RLock()
+        self._save_timer = None
+
+    def get(self, path, kind, loader, fingerprint=None):
+        """Return the index, loading it from path or building it from loader() -> (ids, vectors)
+
+        fingerprint describes the current face data; an index in memory or on
+        disk built from anything else is stale and gets rebuilt.
+        """
+        with self._lock:
+            if self._index is not None and self._index.kind == kind and self._index.fingerprint == fingerprint:
+                return self._index
+            self._path = path
+            if os.path.exists(path):
+                try:
+                    index = load_index(path)
+                    if index.kind == kind and index.fingerprint == fingerprint:
+                        self._index = index
+                        return index
+                except (OSError, ValueError, KeyError):
+                    pass  # unreadable or stale format, rebuild below
+            self._index = self._build(kind, loader, fingerprint)
+            self._schedule_save()
+            return self._index
+
+    def _build(self, kind, loader, fingerprint):
+        index = create_index(kind)
+        ids, vectors = loader()
+        if len(ids):
+            index.add(ids, vectors)
+            if isinstance(index, IVFIndex):
+                index.train()
+        index.fingerprint = fingerprint
+        return index
+
+    def rebuild(self, path, kind, loader, fingerprint=None):
+        """Discard the current index and build it again from the database"""
+        with self._lock:
+            self._path = path
+            self._index = self._build(kind, loader, fingerprint)
+            save_index(self._index, path)
+            return self._index
+
+    def discard(self):
+        """Forget the loaded index so the next get() reads what another process saved"""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            self._index = None
+
+    def upsert(self, student_id, vector, fingerprint=None):
+        """Insert or replace one student's template if the index is loaded
+
+        fingerprint is the face data state after the change. When the index
+        is not loaded nothing is done: the saved file no longer matches the
+        database, so the next get() rebuilds it.
+        """
+        with self._lock:
+            if self._index is not None:
+                self._index.add([student_id], vector)
+                self._index.fingerprint = fingerprint
+                self._schedule_save()
+
+    def remove(self, student_id, fingerprint=None):
+        """Remove one student if the index is loaded, see upsert()"""
+        with self._lock:
+            if self._index is not None:
+                self._index.remove([student_id])
+                self._index.fingerprint = fingerprint
+                self._schedule_save()
+
+    def search(self, probes, path, kind, loader, fingerprint=None, tolerance=FACE_MATCH_TOLERANCE):
+        """get() the index and search it under one lock, so a concurrent discard() cannot slip in between"""
+        with self._lock:
+            return self.get(path, kind, loader, fingerprint).search(probes, tolerance)
+
+    def _schedule_save(self):
+        # Coalesce a burst of enrollments into one write
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+        self._save_timer = threading.Timer(self.save_delay, self._save)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+
+    def _save(self):
+        with self._lock:
+            self._save_timer = None
+            if self._index is not None and self._path:
+                save_index(self._index, self._path)
+
+campus_index = CampusIndex()
@@ -0,0 +1,155 @@
+"""
+Campus Geofence
+Kantipur Engineering College - BCT 5th Semester
+
+QR check-ins are only accepted from inside a campus zone. A zone is a
+circle (center + radius in meters) or a polygon of (lat, lng) points, so
+separate buildings and the off-site lab can each be described.
+
+Zones are projected once into local metric coordinates (equirectangular
+around each zone, accurate to well under a meter at campus scale) and a
+point is tested against every zone at once with NumPy: a distance check
+for the circles and an even-odd ray crossing over all polygon edges. The
+same code validates one check-in or a whole backlog of them.
+"""
+
+import json
+import numpy as np
+
+EARTH_RADIUS = 6371000.0  # meters
+METERS_PER_DEGREE = EARTH_RADIUS * np.pi / 180.0
+
+DEFAULT_ZONES = [
+    {'name': 'KEC Campus', 'center': [27.6635, 85.3161], 'radius': 200},
+]
+
+def load_zones(path):
+    """Read a JSON list of zone dicts"""
+    with open(path) as f:
+        return json.load(f)
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def to_points(lats, lngs):
+    """Float arrays of the points and a mask of those that are real coordinates
+
+    Anything that is not a number, NaN/inf or outside +-90 / +-180 degrees
+    is invalid (stored check-ins are text, so any value can turn up).
+    """
+    try:
+        lats = np.asarray(lats, dtype=np.float64).reshape(-1)
+        lngs = np.asarray(lngs, dtype=np.float64).reshape(-1)
+    except (TypeError, ValueError):
+        lats = np.array([_to_float(value) for value in np.ravel(lats)], dtype=np.float64)
+        lngs = np.array([_to_float(value) for value in np.ravel(lngs)], dtype=np.float64)
+    with np.errstate(invalid='ignore'):
+        valid = np.isfinite(lats) & np.isfinite(lngs) & (np.abs(lats) <= 90.0) & (np.abs(lngs) <= 180.0)
+    return lats, lngs, valid
+
+def parse_point(lat, lng):
+    """(lat, lng) as floats, ValueError unless they are a real coordinate"""
+    lats, lngs, valid = to_points([lat], [lng])
+    if not valid[0]:
+        raise ValueError('Invalid coordinates')
+    return float(lats[0]), float(lngs[0])
+
+class Geofence:
+    """Tests points against a fixed set of circular and polygonal zones"""
+
+    def __init__(self, zones):
+        circles = [zone for zone in zones if 'radius' in zone]
+        polygons = [zone for zone in zones if 'points' in zone]
+        if len(circles) + len(polygons) != len(zones):
+            raise ValueError("Every zone needs either 'center' and 'radius' or 'points'")
+        self.names = [zone.get('name', f'Zone {i + 1}') for i, zone in enumerate(circles + polygons)]
+        self.zones = circles + polygons
+
+        # Circles: center and per-zone meters per degree of longitude
+        centers = np.array([zone['center'] for zone in circles], dtype=np.float64).reshape(-1, 2)
+        self.circle_lat = centers[:, 0]
+        self.circle_lng = centers[:, 1]
+        self.circle_kx = METERS_PER_DEGREE * np.cos(np.radians(self.circle_lat))
+        self.circle_radius = np.array([zone['radius'] for zone in circles], dtype=np.float64)
+
+        # Polygons: every edge, in its polygon's local frame, laid out polygon after polygon
+        origins, edges, starts = [], [], []
+        for zone in polygons:
+            points = np.asarray(zone['points'], dtype=np.float64)
+            if len(points) < 3:
+                raise ValueError(f"Polygon zone '{zone.get('name')}' needs at least 3 points")
+            lat0, lng0 = points.mean(axis=0)
+            kx = METERS_PER_DEGREE * np.cos(np.radians(lat0))
+            xy = np.column_stack([(points[:, 1] - lng0) * kx, (points[:, 0] - lat0) * METERS_PER_DEGREE])
+            starts.append(sum(len(e) for e in edges))
+            edges.append(np.hstack([xy, np.roll(xy, -1, axis=0)]))
+            origins.append(np.repeat([[lat0, lng0, kx]], len(points), axis=0))
+        edges = np.vstack(edges) if edges else np.empty((0, 4))
+        origins = np.vstack(origins) if origins else np.empty((0, 3))
+        self.edge_lat0, self.edge_lng0, self.edge_kx = origins.T
+        self.ax, self.ay, self.bx, self.by = edges.T
+        self.edge_dx = self.bx - self.ax
+        self.edge_dy = self.by - self.ay
+        self.edge_len2 = np.maximum(self.edge_dx ** 2 + self.edge_dy ** 2, 1e-12)
+        # Horizontal edges never cross the ray, avoid dividing by zero for them
+        self.edge_inv_dy = np.where(self.edge_dy == 0, 0.0, 1.0 / np.where(self.edge_dy == 0, 1.0, self.edge_dy))
+        self.polygon_starts = np.array(starts, dtype=np.intp)
+
+    def __len__(self):
+        return len(self.names)
+
+    def distances(self, lats, lngs):
+        """(N, zones) meters from each point to each zone, 0 for points inside"""
+        lats = np.asarray(lats, dtype=np.float64).reshape(-1, 1)
+        lngs = np.asarray(lngs, dtype=np.float64).reshape(-1, 1)
+        result = []
+
+        if len(self.circle_radius):
+            dx = (lngs - self.circle_lng) * self.circle_kx
+            dy = (lats - self.circle_lat) * METERS_PER_DEGREE
+            result.append(np.maximum(np.hypot(dx, dy) - self.circle_radius, 0.0))
+
+        if len(self.polygon_starts):
+            px = (lngs - self.edge_lng0) * self.edge_kx
+            py = (lats - self.edge_lat0) * METERS_PER_DEGREE
+            # Even-odd rule: count edges crossed by a ray from the point towards +x
+            straddles = (self.ay > py) != (self.by > py)
+            crossing_x = self.ax + self.edge_dx * (py - self.ay) * self.edge_inv_dy
+            crossings = (straddles & (px < crossing_x)).astype(np.int32)
+            inside = np.add.reduceat(crossings, self.polygon_starts, axis=1) % 2 == 1
+            # Distance to the nearest edge for points outside
+            t = np.clip(((px - self.ax) * self.edge_dx + (py - self.ay) * self.edge_dy) / self.edge_len2, 0.0, 1.0)
+            edge_dist = np.hypot(px - self.ax - t * self.edge_dx, py - self.ay - t * self.edge_dy)
+            nearest = np.minimum.reduceat(edge_dist, self.polygon_starts, axis=1)
+            result.append(np.where(inside, 0.0, nearest))
+
+        if not result:
+            return np.full((len(lats), 0), np.inf)
+        return np.hstack(result)
+
+    def check_many(self, lats, lngs):
+        """Return (zone index or -1, meters to the nearest zone) arrays for a batch of points
+
+        Points that are not valid coordinates get zone -1 and a NaN distance.
+        """
+        lats, lngs, valid = to_points(lats, lngs)
+        zone = np.full(len(lats), -1)
+        nearest = np.full(len(lats), np.nan)
+        if not valid.any():
+            return zone, nearest
+        dist = self.distances(lats[valid], lngs[valid])
+        if dist.shape[1] == 0:
+            nearest[valid] = np.inf
+            return zone, nearest
+        nearest[valid] = dist.min(axis=1)
+        zone[valid] = np.where(nearest[valid] <= 0.0, dist.argmin(axis=1), -1)
+        return zone, nearest
+
+    def check(self, lat, lng):
+        """Return (zone name or None, meters to the nearest zone) for one point, ValueError if it is invalid"""
+        lat, lng = parse_point(lat, lng)
+        zone, nearest = self.check_many([lat], [lng])
+        return (self.names[zone[0]] if zone[0] >= 0 else None), float(nearest[0])
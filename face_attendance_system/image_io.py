@@ -0,0 +1,56 @@
+"""
+In-Memory Image Ingestion
+Kantipur Engineering College - BCT 5th Semester
+
+Every face endpoint receives JPEG data URLs from the browser. They are
+decoded straight from memory into NumPy arrays; writing the original
+JPEG to disk is an optional side effect done on a background thread so
+it never sits on the request path.
+"""
+
+import os
+import base64
+import binascii
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+
+# A couple of threads are enough: the writes are I/O bound and only there for record keeping
+_writer = ThreadPoolExecutor(max_workers=2, thread_name_prefix='image-writer')
+atexit.register(_writer.shutdown, wait=True)
+
+def split_data_url(image_data):
+    """Return the raw bytes of a base64 image, with or without a data: URL prefix"""
+    if ',' in image_data:
+        image_data = image_data.split(',', 1)[1]
+    try:
+        return base64.b64decode(image_data)
+    except binascii.Error as e:
+        raise ValueError(f'Invalid base64 image: {e}')
+
+def decode_image_bytes(image_bytes):
+    """Decode encoded image bytes (JPEG/PNG) into an RGB array without touching disk"""
+    if not image_bytes:
+        raise ValueError('Empty image')  # cv2.imdecode asserts on an empty buffer
+    buffer = np.frombuffer(image_bytes, dtype=np.uint8)
+    image = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError('Could not decode image')
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+def decode_image_data(image_data):
+    """Decode a base64 image (optionally a data URL) into an RGB array"""
+    return decode_image_bytes(split_data_url(image_data))
+
+def _write_file(path, image_bytes):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(image_bytes)
+    # Atomic replace so readers never see a half-written image
+    os.replace(tmp_path, path)
+
+def save_image_async(path, image_bytes):
+    """Persist the original encoded bytes in the background, return the Future"""
+    return _writer.submit(_write_file, path, image_bytes)
@@ -0,0 +1,137 @@
+"""
+QR Code Rendering Cache
+Kantipur Engineering College - BCT 5th Semester
+
+QR images are rendered once per payload and kept in a bounded in-memory
+LRU as PNG bytes. Entries are keyed by a hash of the payload, which is
+also the ETag, so a browser revalidating an unchanged code gets a 304
+and a change in the encoded data (a renamed student, a new session)
+yields a new key instead of a stale image.
+
+Attendance session QR codes can also carry a rotating token: the session
+and its time slot signed with HMAC. The displayed code changes every few
+seconds, so a forwarded screenshot stops working almost immediately, and
+a scan is verified from the token alone without reading qr_sessions.
+"""
+
+import io
+import hmac
+import json
+import time
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+import qrcode
+
+def payload_key(payload):
+    """Stable hash of a payload (dict or string), used as the cache key and ETag"""
+    if not isinstance(payload, str):
+        payload = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def render_png(payload):
+    """Render a payload (dict or string) to PNG bytes"""
+    if not isinstance(payload, str):
+        payload = json.dumps(payload)
+    buffer = io.BytesIO()
+    qrcode.make(payload).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+class QRCodeCache:
+    """Bounded LRU of rendered QR PNGs keyed by payload hash"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, payload):
+        """Return (png_bytes, etag) for a payload, rendering it on a miss"""
+        key = payload_key(payload)
+        with self._lock:
+            png = self._entries.get(key)
+            if png is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return png, key
+            self.misses += 1
+
+        # Render outside the lock, a concurrent miss on the same payload just renders twice
+        png = render_png(payload)
+        with self._lock:
+            self._entries[key] = png
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return png, key
+
+    def invalidate(self, payload=None):
+        """Drop one payload, or everything when payload is None"""
+        with self._lock:
+            if payload is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(payload_key(payload), None)
+
+qr_cache = QRCodeCache()
+
+# ============================================================================
+# ROTATING SESSION TOKENS
+# ============================================================================
+
+TOKEN_VERSION = 'v1'
+
+class InvalidToken(ValueError):
+    """Raised for a token that is malformed, forged, from an old slot or past its session"""
+
+class RotatingTokenSigner:
+    """Signs (session, time slot) tokens that are valid for the current slot and `skew` previous ones"""
+
+    def __init__(self, secret, period=15, skew=1):
+        self.secret = secret.encode('utf-8') if isinstance(secret, str) else secret
+        self.period = period
+        self.skew = skew
+
+    def slot(self, now=None):
+        return int((time.time() if now is None else now) // self.period)
+
+    def seconds_left(self, now=None):
+        """Seconds until the current slot's token is replaced"""
+        now = time.time() if now is None else now
+        return self.period - (now % self.period)
+
+    def _sign(self, message):
+        digest = hmac.new(self.secret, message.encode('utf-8'), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest[:16]).rstrip(b'=').decode('ascii')
+
+    def issue(self, session_code, subject_id, section_id, expires_at, now=None):
+        """Token for the current slot, expires_at is a UNIX timestamp"""
+        message = '.'.join(str(part) for part in (
+            TOKEN_VERSION, session_code, subject_id, section_id, int(expires_at), self.slot(now)))
+        return f"{message}.{self._sign(message)}"
+
+    def verify(self, token, now=None):
+        """Return the token's session claims, raises InvalidToken"""
+        parts = (token or '').split('.')
+        if len(parts) != 7 or parts[0] != TOKEN_VERSION:
+            raise InvalidToken('Malformed token')
+        message, signature = '.'.join(parts[:6]), parts[6]
+        if not hmac.compare_digest(signature, self._sign(message)):
+            raise InvalidToken('Bad signature')
+
+        _, session_code, subject_id, section_id, expires_at, slot = parts[:6]
+        try:
+            subject_id, section_id, expires_at, slot = int(subject_id), int(section_id), int(expires_at), int(slot)
+        except ValueError:
+            raise InvalidToken('Malformed token')
+        now = time.time() if now is None else now
+        current = self.slot(now)
+        if not current - self.skew <= slot <= current:
+            raise InvalidToken('Token has rotated')
+        if now >= expires_at:
+            raise InvalidToken('Session has expired')
+        return {'session_code': session_code, 'subject_id': subject_id,
+                'section_id': section_id, 'expires_at': expires_at}
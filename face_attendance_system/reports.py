@@ -0,0 +1,361 @@
+"""
+Attendance Report Queries
+Kantipur Engineering College - BCT 5th Semester
+
+Reports are computed with aggregate SQL (COUNT/SUM ... GROUP BY) so only
+the summary rows leave SQLite, and the raw-record drill-down is paged
+with a keyset on attendance.id. Memory and latency stay flat however
+many years of attendance the table holds.
+
+Exports stream the same filtered records straight from the cursor in
+chunks: CSV goes out as it is produced, XLSX is written by xlsxwriter in
+constant_memory mode (one row held at a time) and then streamed.
+
+The attendance register (students down the side, class dates across) is
+read with a single query and pivoted with NumPy index arrays. Built
+registers are cached per subject and section and rebuilt only when the
+subject's write counter (bumped by triggers on attendance) or the
+section's roster has changed.
+"""
+
+import io
+import os
+import csv
+import threading
+from collections import OrderedDict
+import numpy as np
+import xlsxwriter
+
+DRILLDOWN_PAGE_SIZE = 50
+EXPORT_CHUNK_SIZE = 1000
+REGISTER_PAGE_SIZE = 40
+
+# ============================================================================
+# FILTERS AND AGGREGATES
+# ============================================================================
+
+class AttendanceFilter:
+    """WHERE clause over attendance a (joined to student s) built from the report form"""
+
+    def __init__(self, subject_id=None, section_id=None, start_date=None, end_date=None):
+        self.subject_id = subject_id or None
+        self.section_id = section_id or None
+        self.start_date = start_date or None
+        self.end_date = end_date or None
+
+    @classmethod
+    def from_args(cls, args):
+        return cls(args.get('subject_id'), args.get('section_id'), args.get('start_date'), args.get('end_date'))
+
+    @property
+    def needs_student(self):
+        return self.section_id is not None
+
+    def where(self, extra=None):
+        """Return (sql, params) for the filter, optionally AND-ed with extra conditions"""
+        clauses, params = [], []
+        if self.subject_id:
+            clauses.append("a.subject_id = ?")
+            params.append(self.subject_id)
+        if self.section_id:
+            clauses.append("s.section_id = ?")
+            params.append(self.section_id)
+        if self.start_date:
+            clauses.append("a.class_date >= ?")
+            params.append(self.start_date)
+        if self.end_date:
+            clauses.append("a.class_date <= ?")
+            params.append(self.end_date)
+        for clause, values in extra or []:
+            clauses.append(clause)
+            params.extend(values)
+        sql = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        return sql, params
+
+    def source(self, with_student=False):
+        """FROM clause, joining student only when the filter or the query needs it"""
+        if with_student or self.needs_student:
+            return "FROM attendance a JOIN student s ON a.student_id = s.id"
+        return "FROM attendance a"
+
+    def as_args(self):
+        return {key: value for key, value in (
+            ('subject_id', self.subject_id), ('section_id', self.section_id),
+            ('start_date', self.start_date), ('end_date', self.end_date)) if value}
+
+def taught_by(teacher_id):
+    """Extra condition limiting attendance to the subjects a teacher teaches"""
+    return [("a.subject_id IN (SELECT id FROM subject WHERE teacher_id = ?)", [teacher_id])]
+
+def _fetchall(conn, sql, params):
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+def status_counts(conn, filters):
+    """{status: count} over the filtered attendance"""
+    where, params = filters.where()
+    rows = _fetchall(conn, f"SELECT a.status, COUNT(*) as count {filters.source()}{where} GROUP BY a.status", params)
+    return {row['status']: row['count'] for row in rows}
+
+def counts_by_subject(conn, filters):
+    """Present/absent/late/total per subject"""
+    where, params = filters.where()
+    return _fetchall(conn, f"""
+        SELECT a.subject_id, sub.subject_code, sub.subject_name,
+               COUNT(*) as total,
+               SUM(a.status = 'present') as present,
+               SUM(a.status = 'absent') as absent,
+               SUM(a.status = 'late') as late
+        {filters.source()}
+        LEFT JOIN subject sub ON a.subject_id = sub.id
+        {where}
+        GROUP BY a.subject_id
+        ORDER BY sub.subject_code
+    """, params)
+
+def counts_by_section(conn, filters):
+    """Present/absent/late/total per section"""
+    where, params = filters.where()
+    return _fetchall(conn, f"""
+        SELECT s.section_id, sec.name as section_name,
+               COUNT(*) as total,
+               SUM(a.status = 'present') as present,
+               SUM(a.status = 'absent') as absent,
+               SUM(a.status = 'late') as late
+        {filters.source(with_student=True)}
+        LEFT JOIN section sec ON s.section_id = sec.id
+        {where}
+        GROUP BY s.section_id
+        ORDER BY sec.name
+    """, params)
+
+def counts_by_date(conn, filters, limit=30):
+    """Present/total per class date for the most recent dates in range, oldest first"""
+    where, params = filters.where()
+    rows = _fetchall(conn, f"""
+        SELECT a.class_date,
+               COUNT(*) as total,
+               SUM(a.status = 'present') as present
+        {filters.source()}
+        {where}
+        GROUP BY a.class_date
+        ORDER BY a.class_date DESC
+        LIMIT ?
+    """, params + [limit])
+    return list(reversed(rows))
+
+def drilldown(conn, filters, before_id=None, page_size=DRILLDOWN_PAGE_SIZE):
+    """One page of raw records, newest first, plus the id to continue from (None on the last page)"""
+    extra = [("a.id < ?", [before_id])] if before_id else []
+    where, params = filters.where(extra)
+    rows = _fetchall(conn, f"""
+        SELECT a.id, a.class_date, a.status, a.check_in_time, a.is_manual,
+               s.student_id as student_code, u.first_name, u.last_name,
+               sub.subject_code, sec.name as section_name
+        {filters.source(with_student=True)}
+        JOIN user u ON s.user_id = u.id
+        LEFT JOIN subject sub ON a.subject_id = sub.id
+        LEFT JOIN section sec ON s.section_id = sec.id
+        {where}
+        ORDER BY a.id DESC
+        LIMIT ?
+    """, params + [page_size + 1])
+    next_before = rows[page_size - 1]['id'] if len(rows) > page_size else None
+    return rows[:page_size], next_before
+
+# ============================================================================
+# STREAMING EXPORT
+# ============================================================================
+
+EXPORT_COLUMNS = ['Date', 'Student ID', 'First Name', 'Last Name', 'Section',
+                  'Subject Code', 'Subject', 'Status', 'Check-in Time', 'Manual']
+
+def export_query(filters, extra=None):
+    """(sql, params) for the export rows
+
+    There is deliberately no ORDER BY: rows come out in the order of
+    whichever index the filter uses. Once the query is narrowed by subject,
+    section or teacher no index also yields attendance.id order, so SQLite
+    would sort the whole result in a temp B-tree before the first row.
+    """
+    where, params = filters.where(extra)
+    return f"""
+        SELECT a.class_date, s.student_id, u.first_name, u.last_name, sec.name,
+               sub.subject_code, sub.subject_name, a.status, a.check_in_time, a.is_manual
+        {filters.source(with_student=True)}
+        JOIN user u ON s.user_id = u.id
+        LEFT JOIN subject sub ON a.subject_id = sub.id
+        LEFT JOIN section sec ON s.section_id = sec.id
+        {where}
+    """, params
+
+def export_chunks(conn, filters, extra=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield lists of export rows, never holding more than one chunk"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(*export_query(filters, extra))
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield [tuple(row[:-1]) + ('Yes' if row[-1] else 'No',) for row in rows]
+    finally:
+        cursor.close()
+
+def iter_csv(chunks):
+    """Encode chunks of rows as CSV text, one string for the header and one per chunk"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # The header goes out before the first query runs, so the download starts at once
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue()
+    for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+def write_xlsx(chunks, path, title='Attendance'):
+    """Write chunks of rows to an XLSX file without keeping the sheet in memory"""
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+    try:
+        sheet = workbook.add_worksheet(title[:31])
+        bold = workbook.add_format({'bold': True})
+        sheet.write_row(0, 0, EXPORT_COLUMNS, bold)
+        sheet.set_column(0, 0, 12)
+        sheet.set_column(1, 6, 16)
+        row_number = 1
+        for rows in chunks:
+            for row in rows:
+                sheet.write_row(row_number, 0, row)
+                row_number += 1
+    finally:
+        workbook.close()
+    return row_number - 1
+
+def iter_file(path, block_size=64 * 1024, remove=True):
+    """Yield a file's bytes block by block, deleting it afterwards"""
+    try:
+        with open(path, 'rb') as f:
+            while True:
+                block = f.read(block_size)
+                if not block:
+                    return
+                yield block
+    finally:
+        if remove:
+            os.remove(path)
+
+# ============================================================================
+# ATTENDANCE REGISTER
+# ============================================================================
+
+# Cell codes of the register matrix, 0 is "no class record"
+STATUS_CODES = {'present': 1, 'absent': 2, 'late': 3}
+CELL_LABELS = np.array(['', 'P', 'A', 'L'])
+
+def register_version(conn, subject_id, section_id):
+    """Subject's attendance write counter plus a roster stamp (student count, newest id) of the section"""
+    row = conn.execute("""
+        SELECT COALESCE((SELECT version FROM attendance_version WHERE subject_id = ?), 0),
+               COUNT(*), COALESCE(MAX(id), 0)
+        FROM student WHERE section_id = ?
+    """, (subject_id, section_id)).fetchone()
+    return tuple(row)
+
+class Register:
+    """Students x class dates matrix of status codes with per-student and per-date totals"""
+
+    def __init__(self, students, dates, codes):
+        self.students = students
+        self.dates = dates
+        self.codes = codes
+        self.present = (codes == STATUS_CODES['present']).sum(axis=1)
+        self.total = (codes > 0).sum(axis=1)
+        self.percent = np.round(100.0 * self.present / np.maximum(self.total, 1), 1)
+        self.present_by_date = (codes == STATUS_CODES['present']).sum(axis=0)
+
+    def __len__(self):
+        return len(self.students)
+
+    def pages(self, per_page=REGISTER_PAGE_SIZE):
+        return max(1, -(-len(self.students) // per_page))
+
+    def page(self, number, per_page=REGISTER_PAGE_SIZE):
+        """Rows of one page of students: student dict, cell labels, present, total, percent"""
+        start = (min(max(number, 1), self.pages(per_page)) - 1) * per_page
+        stop = start + per_page
+        labels = CELL_LABELS[self.codes[start:stop]].tolist()
+        return [
+            {'student': student, 'cells': cells, 'present': present, 'total': total, 'percent': percent}
+            for student, cells, present, total, percent in zip(
+                self.students[start:stop], labels, self.present[start:stop].tolist(),
+                self.total[start:stop].tolist(), self.percent[start:stop].tolist())
+        ]
+
+def build_register(conn, subject_id, section_id):
+    """Read a section's roster with its attendance in one subject and pivot it into a Register"""
+    rows = _fetchall(conn, """
+        SELECT s.id, s.student_id, s.roll_number, u.first_name, u.last_name, a.class_date, a.status
+        FROM student s
+        JOIN user u ON s.user_id = u.id
+        LEFT JOIN attendance a ON a.student_id = s.id AND a.subject_id = ?
+        WHERE s.section_id = ?
+        ORDER BY s.roll_number, s.student_id, a.class_date
+    """, [subject_id, section_id])
+    if not rows:
+        return Register([], [], np.zeros((0, 0), dtype=np.int8))
+
+    ids, codes_in, dates_in = (np.array(column, dtype=object) for column in zip(
+        *[(row[0], STATUS_CODES.get(row[6], 0), row[5]) for row in rows]))
+    ids = ids.astype(np.int64)
+    codes_in = codes_in.astype(np.int8)
+
+    # Students keep roster order: rank each id by where it first appears
+    unique_ids, first, student_index = np.unique(ids, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty(len(order), dtype=np.intp)
+    rank[order] = np.arange(len(order))
+    student_index = rank[student_index]
+    students = [
+        {'id': int(rows[i][0]), 'student_code': rows[i][1], 'roll_number': rows[i][2],
+         'first_name': rows[i][3], 'last_name': rows[i][4]}
+        for i in first[order].tolist()
+    ]
+
+    # Dates come out of np.unique sorted, ISO strings sort chronologically
+    recorded = np.flatnonzero(dates_in != None)  # noqa: E711 (elementwise on an object array)
+    dates, date_index = np.unique(dates_in[recorded].astype(str), return_inverse=True)
+    codes = np.zeros((len(students), len(dates)), dtype=np.int8)
+    codes[student_index[recorded], date_index] = codes_in[recorded]
+    return Register(students, dates.tolist(), codes)
+
+class RegisterCache:
+    """Bounded LRU of built registers, reused while their register_version is unchanged"""
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, conn, subject_id, section_id):
+        key = (int(subject_id), int(section_id))
+        version = register_version(conn, *key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        register = build_register(conn, *key)
+        with self._lock:
+            self._entries[key] = (version, register)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return register
+
+register_cache = RegisterCache()
@@ -0,0 +1,216 @@
+"""
+Bulk Student Import
+Kantipur Engineering College - BCT 5th Semester
+
+A new intake arrives as one CSV or XLSX sheet. Rows are streamed from
+the file, validated against each other and the existing accounts, and
+the valid ones are written with executemany in a single transaction.
+
+Password hashing (PBKDF2) is deliberately slow and CPU-bound, so for a
+whole intake it is spread over a process pool instead of running one
+hash after another. The app keeps one long-lived pool for the web
+upload and the CLI; its workers are spawned rather than forked, since
+forking a threaded server (DB writer, camera threads) is unsafe.
+"""
+
+import io
+import os
+import csv
+import sqlite3
+import multiprocessing
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+import openpyxl
+from openpyxl.utils.exceptions import InvalidFileException
+from werkzeug.security import generate_password_hash
+
+REQUIRED_COLUMNS = ('username', 'email', 'first_name', 'last_name', 'student_id', 'section')
+OPTIONAL_COLUMNS = ('password', 'roll_number')
+
+# Below this many passwords the pool start-up costs more than it saves
+POOL_THRESHOLD = 16
+
+def _normalize_header(name):
+    return str(name or '').strip().lower().replace(' ', '_')
+
+def _check_header(header):
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+    return header
+
+def read_rows(stream, filename):
+    """Yield (line number, row dict) from a CSV or XLSX file object
+
+    Raises ValueError if columns are missing or the file cannot be parsed.
+    """
+    try:
+        yield from _iter_rows(stream, filename)
+    except (InvalidFileException, zipfile.BadZipFile, csv.Error, UnicodeDecodeError) as e:
+        raise ValueError(f'not a valid CSV or Excel file ({e})') from e
+
+def _iter_rows(stream, filename):
+    if filename.lower().endswith(('.xlsx', '.xlsm')):
+        workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = _check_header([_normalize_header(name) for name in next(rows, ())])
+            for line, values in enumerate(rows, start=2):
+                if any(value not in (None, '') for value in values):
+                    yield line, dict(zip(header, values))
+        finally:
+            workbook.close()
+    else:
+        if isinstance(stream.read(0), bytes):
+            stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        reader = csv.reader(stream)
+        header = _check_header([_normalize_header(name) for name in next(reader, ())])
+        for line, values in enumerate(reader, start=2):
+            if any(value.strip() for value in values):
+                yield line, dict(zip(header, values))
+
+def _clean(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # spreadsheet numbers come back as floats
+    return str(value).strip()
+
+def validate_rows(rows, sections, existing, default_password=None):
+    """Split rows into (valid records, [(line, message)] errors)
+
+    sections maps a section name (lowercase) or id string to its id;
+    existing holds the sets of taken 'username', 'email' and 'student_id'.
+    """
+    seen = {key: set(values) for key, values in existing.items()}
+    records, errors = [], []
+    for line, raw in rows:
+        row = {key: _clean(raw.get(key)) for key in REQUIRED_COLUMNS + OPTIONAL_COLUMNS}
+        missing = [key for key in REQUIRED_COLUMNS if not row[key]]
+        if missing:
+            errors.append((line, f"missing {', '.join(missing)}"))
+            continue
+        if '@' not in row['email']:
+            errors.append((line, f"invalid email '{row['email']}'"))
+            continue
+        section_id = sections.get(row['section'].lower())
+        if section_id is None:
+            errors.append((line, f"unknown section '{row['section']}'"))
+            continue
+        roll_number = None
+        if row['roll_number']:
+            try:
+                roll_number = int(row['roll_number'])
+            except ValueError:
+                errors.append((line, f"roll number '{row['roll_number']}' is not a number"))
+                continue
+        password = row['password'] or default_password
+        if not password:
+            errors.append((line, 'missing password and no default password given'))
+            continue
+        duplicate = next((key for key in ('username', 'email', 'student_id') if row[key] in seen[key]), None)
+        if duplicate:
+            errors.append((line, f"{duplicate} '{row[duplicate]}' already exists"))
+            continue
+
+        for key in ('username', 'email', 'student_id'):
+            seen[key].add(row[key])
+        records.append({
+            'line': line, 'username': row['username'], 'email': row['email'],
+            'first_name': row['first_name'], 'last_name': row['last_name'],
+            'student_id': row['student_id'], 'section_id': section_id,
+            'roll_number': roll_number, 'password': password,
+        })
+    return records, errors
+
+def hash_pool(workers=None):
+    """Process pool for hash_passwords, safe to create from a threaded server and meant to be reused"""
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                               mp_context=multiprocessing.get_context('spawn'))
+
+def hash_passwords(passwords, pool=None):
+    """generate_password_hash for every password, across the pool for large batches (no pool: in-process)"""
+    passwords = list(passwords)
+    if pool is None or len(passwords) < POOL_THRESHOLD:
+        return [generate_password_hash(password) for password in passwords]
+    chunksize = max(1, len(passwords) // ((os.cpu_count() or 1) * 4))
+    return list(pool.map(generate_password_hash, passwords, chunksize=chunksize))
+
+def load_lookups(conn):
+    """Section ids by name/id and the usernames, emails and student ids already taken"""
+    sections = {}
+    for row in conn.execute("SELECT id, name FROM section"):
+        sections[str(row['name']).lower()] = row['id']
+        sections[str(row['id'])] = row['id']
+    existing = {
+        'username': {row[0] for row in conn.execute("SELECT username FROM user")},
+        'email': {row[0] for row in conn.execute("SELECT email FROM user")},
+        'student_id': {row[0] for row in conn.execute("SELECT student_id FROM student")},
+    }
+    return sections, existing
+
+def _insert(conn, records, password_hashes):
+    conn.executemany("""
+        INSERT INTO user (username, password_hash, email, first_name, last_name, role, is_active)
+        VALUES (?, ?, ?, ?, ?, 'student', 1)
+    """, [(r['username'], password_hash, r['email'], r['first_name'], r['last_name'])
+          for r, password_hash in zip(records, password_hashes)])
+    # Look up each new user id through the unique username index
+    conn.executemany("""
+        INSERT INTO student (user_id, student_id, section_id, roll_number)
+        SELECT id, ?, ?, ? FROM user WHERE username = ?
+    """, [(r['student_id'], r['section_id'], r['roll_number'], r['username']) for r in records])
+
+def _conflict_message(record, error):
+    column = next((key for key in ('username', 'email', 'student_id') if f'.{key}' in str(error)), None)
+    if column:
+        return f"{column} '{record[column]}' already exists"
+    return str(error)
+
+def insert_students(conn, records, password_hashes):
+    """Write users and students in one transaction, return [(line, message)] for rows that clash
+
+    Rows validated against the accounts of a moment ago can still hit a
+    UNIQUE constraint (a concurrent import or registration). Then the batch
+    is retried row by row, each in a savepoint, and only the clashing rows
+    are reported and skipped.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _insert(conn, records, password_hashes)
+        conn.commit()
+        return []
+    except sqlite3.IntegrityError:
+        conn.rollback()
+    except Exception:
+        conn.rollback()
+        raise
+
+    errors = []
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for record, password_hash in zip(records, password_hashes):
+            conn.execute("SAVEPOINT import_row")
+            try:
+                _insert(conn, [record], [password_hash])
+            except sqlite3.IntegrityError as e:
+                conn.execute("ROLLBACK TO import_row")
+                errors.append((record['line'], _conflict_message(record, e)))
+            conn.execute("RELEASE import_row")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return errors
+
+def import_students(conn, stream, filename, default_password=None, pool=None):
+    """Import a CSV/XLSX of students, return (number imported, [(line, message)] errors)"""
+    sections, existing = load_lookups(conn)
+    if conn.in_transaction:
+        conn.commit()
+    records, errors = validate_rows(read_rows(stream, filename), sections, existing, default_password)
+    if not records:
+        return 0, errors
+    password_hashes = hash_passwords([record['password'] for record in records], pool)
+    conflicts = insert_students(conn, records, password_hashes)
+    return len(records) - len(conflicts), sorted(errors + conflicts)
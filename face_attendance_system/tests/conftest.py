@@ -0,0 +1,60 @@
+"""
+Shared test fixtures
+Kantipur Engineering College - BCT 5th Semester
+"""
+
+import os
+import numpy as np
+import pytest
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+def random_faces(rng, count):
+    """Encodings shaped like face_recognition's: distinct people sit ~1.4 apart"""
+    return rng.normal(scale=0.09, size=(count, 128)).astype(np.float32)
+
+def same_face(rng, faces, noise=0.02):
+    """Another photo of the same people, ~0.3 from their enrollment"""
+    return (faces + rng.normal(scale=noise, size=faces.shape)).astype(np.float32)
+
+@pytest.fixture
+def app_db(tmp_path):
+    """Connection to a fresh database created by init_database() (needs the full app stack)"""
+    pytest.importorskip('face_recognition')
+    import app as attendance_app
+    flask_app = attendance_app.app
+    defaults = {key: flask_app.config[key] for key in ('DATABASE', 'CACHE_SIGNAL_PATH', 'FACE_SIGNAL_PATH')}
+    for key in defaults:
+        flask_app.config[key] = str(tmp_path / os.path.basename(defaults[key]))
+    # Process-wide caches must not carry rows of another test's database
+    for name in ('checkin_cache', 'face_signal', 'face_signal_version'):
+        flask_app.extensions.pop(name, None)
+    attendance_app.gallery_cache.invalidate()
+    attendance_app.encoding_cache.invalidate()
+    attendance_app.campus_index.discard()
+    try:
+        with flask_app.app_context():
+            attendance_app.init_database()
+            yield attendance_app.get_db_connection()
+    finally:
+        flask_app.config.update(defaults)
+
+@pytest.fixture
+def client(app_db):
+    """Flask test client on the app_db database"""
+    import app as attendance_app
+    return attendance_app.app.test_client()
+
+def login(client, username, password='admin123'):
+    """Sign in as one of the accounts init_database() seeds (admin, teacher1) or a test's own"""
+    response = client.post('/login', data={'username': username, 'password': password})
+    assert response.status_code == 302, 'login failed'
+
+def image_data_url(width=8, height=8):
+    """A small PNG as the data URL a browser's canvas produces"""
+    import base64
+    import cv2
+    ok, png = cv2.imencode('.png', np.zeros((height, width, 3), np.uint8))
+    return 'data:image/png;base64,' + base64.b64encode(png.tobytes()).decode('ascii')
@@ -0,0 +1,74 @@
+import random
+
+RECOMPUTED = """
+    SELECT student_id, subject_id,
+           SUM(status = 'present'), SUM(status = 'absent'), SUM(status = 'late'),
+           COUNT(*), MAX(class_date)
+    FROM attendance GROUP BY student_id, subject_id ORDER BY student_id, subject_id
+"""
+SUMMARY = """
+    SELECT student_id, subject_id, present, absent, late, total, last_date
+    FROM attendance_summary ORDER BY student_id, subject_id
+"""
+
+def rows(conn, sql):
+    return [tuple(row) for row in conn.execute(sql)]
+
+def insert(conn, student_id, subject_id, class_date, status):
+    conn.execute("INSERT INTO attendance (student_id, subject_id, class_date, status) VALUES (?, ?, ?, ?)",
+                 (student_id, subject_id, class_date, status))
+
+def test_insert_counts_each_status(app_db):
+    insert(app_db, 1, 1, '2026-03-02', 'present')
+    insert(app_db, 1, 1, '2026-03-03', 'late')
+    insert(app_db, 1, 1, '2026-03-01', 'absent')
+    assert rows(app_db, SUMMARY) == [(1, 1, 1, 1, 1, 3, '2026-03-03')]
+
+def test_update_moves_counts(app_db):
+    insert(app_db, 1, 1, '2026-03-02', 'absent')
+    insert(app_db, 1, 1, '2026-03-03', 'present')
+    app_db.execute("UPDATE attendance SET status = 'present' WHERE class_date = '2026-03-02'")
+    # A row moved to another subject leaves one summary and joins another
+    app_db.execute("UPDATE attendance SET subject_id = 2 WHERE class_date = '2026-03-03'")
+    assert rows(app_db, SUMMARY) == [(1, 1, 1, 0, 0, 1, '2026-03-02'), (1, 2, 1, 0, 0, 1, '2026-03-03')]
+
+def test_delete_recomputes_last_date_and_drops_empty_rows(app_db):
+    insert(app_db, 1, 1, '2026-03-02', 'present')
+    insert(app_db, 1, 1, '2026-03-09', 'absent')
+    insert(app_db, 2, 1, '2026-03-02', 'present')
+    app_db.execute("DELETE FROM attendance WHERE class_date = '2026-03-09'")
+    app_db.execute("DELETE FROM attendance WHERE student_id = 2")
+    assert rows(app_db, SUMMARY) == [(1, 1, 1, 0, 0, 1, '2026-03-02')]
+
+def test_upsert_that_does_nothing_leaves_counts(app_db):
+    insert(app_db, 1, 1, '2026-03-02', 'present')
+    app_db.execute("""
+        INSERT INTO attendance (student_id, subject_id, class_date, status) VALUES (1, 1, '2026-03-02', 'absent')
+        ON CONFLICT (student_id, subject_id, class_date) DO NOTHING
+    """)
+    assert rows(app_db, SUMMARY) == [(1, 1, 1, 0, 0, 1, '2026-03-02')]
+
+def test_random_writes_match_a_full_recount(app_db):
+    import app as attendance_app
+    rand = random.Random(0)
+    statuses = ['present', 'absent', 'late']
+    for _ in range(600):
+        student_id, subject_id = rand.randint(1, 8), rand.randint(1, 3)
+        class_date = f'2026-03-{rand.randint(1, 20):02d}'
+        action = rand.random()
+        if action < 0.6:
+            app_db.execute("""
+                INSERT INTO attendance (student_id, subject_id, class_date, status) VALUES (?, ?, ?, ?)
+                ON CONFLICT (student_id, subject_id, class_date) DO UPDATE SET status = excluded.status
+            """, (student_id, subject_id, class_date, rand.choice(statuses)))
+        elif action < 0.8:
+            app_db.execute("UPDATE attendance SET status = ? WHERE student_id = ? AND subject_id = ?",
+                           (rand.choice(statuses), student_id, subject_id))
+        else:
+            app_db.execute("DELETE FROM attendance WHERE student_id = ? AND class_date <= ?", (student_id, class_date))
+    app_db.commit()
+    assert rows(app_db, SUMMARY) == rows(app_db, RECOMPUTED)
+
+    app_db.execute("UPDATE attendance_summary SET present = present + 5")
+    attendance_app.rebuild_attendance_summary(app_db)
+    assert rows(app_db, SUMMARY) == rows(app_db, RECOMPUTED)
@@ -0,0 +1,81 @@
+import time
+import pytest
+from checkin_cache import CheckinCache, InvalidationSignal
+
+class Loader:
+    """Counts database reads, returns whatever rows holds for the key"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+
+    def __call__(self, key):
+        self.calls += 1
+        return self.rows.get(key)
+
+def session(subject_id, expires_in=600):
+    return {'subject_id': subject_id, 'section_id': 1, 'subject_name': 'Networks', 'expires_at': time.time() + expires_in}
+
+@pytest.fixture
+def signal(tmp_path):
+    return InvalidationSignal(str(tmp_path / 'cache.signal'))
+
+def test_signal_changes_on_every_bump(signal):
+    assert signal.version() is None
+    versions = set()
+    for _ in range(5):
+        signal.bump()
+        versions.add(signal.version())
+    # Back-to-back bumps within one mtime tick are still told apart
+    assert len(versions) == 5
+
+def test_session_is_loaded_once(signal):
+    cache = CheckinCache(signal)
+    loader = Loader({'abc': session(1)})
+    assert cache.get_session('abc', loader)['subject_id'] == 1
+    assert cache.get_session('abc', loader)['subject_id'] == 1
+    assert loader.calls == 1
+
+def test_expired_session_is_dropped_without_a_read(signal):
+    cache = CheckinCache(signal)
+    cache.put_session('abc', session(1, expires_in=-1))
+    loader = Loader({'abc': session(1)})
+    assert cache.get_session('abc', loader) is None
+    assert loader.calls == 0
+
+def test_unknown_students_are_not_cached(signal):
+    cache = CheckinCache(signal)
+    loader = Loader({})
+    assert cache.get_student(5, loader) is None
+    loader.rows[5] = {'id': 9, 'section_id': 1}
+    assert cache.get_student(5, loader) == {'id': 9, 'section_id': 1}
+    assert cache.get_student(5, loader) == {'id': 9, 'section_id': 1}
+    assert loader.calls == 2
+
+def test_invalidate_in_one_worker_clears_the_others(signal):
+    # Two worker processes share only the signal file
+    teacher_worker, student_worker = CheckinCache(signal), CheckinCache(signal)
+    sessions = Loader({'old': session(1)})
+    students = Loader({5: {'id': 9, 'section_id': 1}})
+    student_worker.get_session('old', sessions)
+    student_worker.get_student(5, students)
+
+    # The teacher opens a new session, replacing 'old'
+    del sessions.rows['old']
+    teacher_worker.invalidate(session_codes=['old'])
+    assert student_worker.get_session('old', sessions) is None
+    assert sessions.calls == 2
+    # Everything else is reloaded too, once
+    student_worker.get_student(5, students)
+    student_worker.get_student(5, students)
+    assert students.calls == 2
+
+def test_invalidate_keeps_the_callers_other_entries(signal):
+    cache = CheckinCache(signal)
+    loader = Loader({'a': session(1), 'b': session(2)})
+    cache.get_session('a', loader)
+    cache.get_session('b', loader)
+    cache.invalidate(session_codes=['a'])
+    cache.get_session('a', loader)
+    cache.get_session('b', loader)
+    assert loader.calls == 3
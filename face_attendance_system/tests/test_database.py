@@ -0,0 +1,71 @@
+import sqlite3
+import pytest
+from database import ConnectionPool, BatchWriter
+
+INSERT = "INSERT INTO checkin (student_id) VALUES (?)"
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'attendance.db'), {'journal_mode': 'WAL'}, max_idle=2, timeout=1.0)
+    conn = pool.connect()
+    conn.execute("CREATE TABLE checkin (student_id INTEGER PRIMARY KEY)")
+    conn.commit()
+    conn.close()
+    yield pool
+    pool.close_all()
+
+def student_ids(pool):
+    conn = pool.connect()
+    try:
+        return [row[0] for row in conn.execute("SELECT student_id FROM checkin ORDER BY student_id")]
+    finally:
+        conn.close()
+
+def test_busy_timeout_pragma_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match='timeout='):
+        ConnectionPool(str(tmp_path / 'attendance.db'), {'busy_timeout': 5000})
+
+def test_release_rolls_back_and_reuses_the_connection(pool):
+    conn = pool.acquire()
+    conn.execute(INSERT, (1,))
+    assert conn.in_transaction
+    pool.release(conn)
+    assert not conn.in_transaction
+    assert pool.acquire() is conn
+    assert student_ids(pool) == []
+
+def test_release_closes_connections_beyond_max_idle(pool):
+    conns = [pool.acquire() for _ in range(3)]
+    for conn in conns:
+        pool.release(conn)
+    with pytest.raises(sqlite3.ProgrammingError):
+        conns[2].execute("SELECT 1")
+    assert {pool.acquire(), pool.acquire()} == set(conns[:2])
+
+def test_failed_write_is_reported_to_its_caller_only(pool):
+    conn = pool.connect()
+    conn.execute(INSERT, (2,))
+    conn.commit()
+    conn.close()
+    # A long delay keeps all three writes in one batch
+    writer = BatchWriter(pool, max_delay=0.5)
+    futures = [writer.submit(INSERT, (1,)), writer.submit(INSERT, (2,)), writer.submit(INSERT, (3,))]
+    assert futures[0].result(timeout=5) == 1
+    with pytest.raises(sqlite3.IntegrityError):
+        futures[1].result(timeout=5)
+    assert futures[2].result(timeout=5) == 1
+    assert writer.batches == 1
+    assert student_ids(pool) == [1, 2, 3]
+
+def test_burst_is_group_committed(pool):
+    writer = BatchWriter(pool, max_batch=200, max_delay=0.2)
+    futures = [writer.submit(INSERT, (student_id,)) for student_id in range(1000)]
+    assert sum(future.result(timeout=10) for future in futures) == 1000
+    assert writer.writes == 1000
+    assert writer.batches <= 10
+    assert len(student_ids(pool)) == 1000
+
+def test_many_writes_one_statement(pool):
+    writer = BatchWriter(pool)
+    assert writer.execute(INSERT, [(1,), (2,)], many=True) == 2
+    assert student_ids(pool) == [1, 2]
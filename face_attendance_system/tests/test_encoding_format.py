@@ -0,0 +1,57 @@
+import pickle
+import sqlite3
+import numpy as np
+import pytest
+from face_gallery import (ENCODING_BYTES, encode_encoding, decode_encoding, decode_encodings,
+                          is_compact_encoding, migrate_legacy_encodings)
+from conftest import random_faces
+
+def test_round_trip_is_exact_float32(rng):
+    face = random_faces(rng, 1)[0]
+    blob = encode_encoding(face)
+    assert len(blob) == ENCODING_BYTES == 516
+    assert blob[:3] == b'FE\x01' and is_compact_encoding(blob)
+    np.testing.assert_array_equal(decode_encoding(blob), face)
+
+def test_float64_input_is_stored_as_float32(rng):
+    face = rng.normal(scale=0.09, size=128)
+    decoded = decode_encoding(encode_encoding(face))
+    assert decoded.dtype == np.float32
+    np.testing.assert_allclose(decoded, face, rtol=1e-6)
+
+def test_decode_many_keeps_order(rng):
+    faces = random_faces(rng, 25)
+    decoded = decode_encodings([encode_encoding(face) for face in faces])
+    assert decoded.shape == (25, 128) and decoded.flags['C_CONTIGUOUS']
+    np.testing.assert_array_equal(decoded, faces)
+
+@pytest.mark.parametrize('blob', [
+    pickle.dumps(np.zeros(128)),  # legacy format
+    b'FE\x02\x00' + bytes(512),  # unknown version
+    b'XX\x01\x00' + bytes(512),  # wrong magic
+    b'FE\x01\x00' + bytes(10),  # truncated
+])
+def test_unrecognised_blobs_are_rejected(blob):
+    with pytest.raises(ValueError, match='migrate-encodings'):
+        decode_encodings([blob])
+
+def test_one_bad_blob_fails_the_batch(rng):
+    blobs = [encode_encoding(face) for face in random_faces(rng, 3)]
+    blobs[1] = b'XX' + blobs[1][2:]
+    with pytest.raises(ValueError):
+        decode_encodings(blobs)
+
+def test_migrate_legacy_encodings(rng):
+    faces = rng.normal(scale=0.09, size=(3, 128))
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE student (id INTEGER PRIMARY KEY, face_encoding BLOB)")
+    conn.executemany("INSERT INTO student VALUES (?, ?)", [
+        (1, pickle.dumps(faces[0])),
+        (2, encode_encoding(faces[1])),
+        (3, pickle.dumps(faces[2])),
+        (4, None),
+    ])
+    assert migrate_legacy_encodings(conn) == 2
+    blobs = dict(conn.execute("SELECT id, face_encoding FROM student WHERE face_encoding IS NOT NULL"))
+    np.testing.assert_allclose(decode_encodings([blobs[1], blobs[2], blobs[3]]), faces, rtol=1e-6)
+    assert migrate_legacy_encodings(conn) == 0
@@ -0,0 +1,67 @@
+import csv
+import io
+import pytest
+from openpyxl import load_workbook
+from reports import AttendanceFilter, EXPORT_COLUMNS, export_chunks, export_query, iter_csv, taught_by, write_xlsx
+
+@pytest.fixture
+def export_db(app_db):
+    # init_database() seeds sections 1-2 and teacher user 2
+    app_db.executescript("""
+        INSERT INTO user (id, username, password_hash, email, first_name, last_name, role) VALUES
+            (10, 's1', '-', 's1@kec.edu.np', 'Sita', 'Rai', 'student'),
+            (11, 's2', '-', 's2@kec.edu.np', 'Ram', 'KC', 'student');
+        INSERT INTO student (id, user_id, student_id, section_id) VALUES
+            (1, 10, '080BCT001', 1), (2, 11, '080BCT002', 2);
+        INSERT INTO subject (id, subject_code, subject_name, teacher_id, section_id) VALUES
+            (1, 'CT501', 'Computer Networks', 2, 1), (2, 'CT502', 'Compilers', NULL, 2);
+        INSERT INTO attendance (student_id, subject_id, class_date, status, check_in_time, is_manual) VALUES
+            (1, 1, '2026-03-01', 'present', '09:05', 0),
+            (1, 1, '2026-03-02', 'late', '09:20', 1),
+            (2, 2, '2026-03-01', 'absent', NULL, 0);
+    """)
+    return app_db
+
+@pytest.mark.parametrize('filters, extra', [
+    (AttendanceFilter(), None),
+    (AttendanceFilter(subject_id=1), None),
+    (AttendanceFilter(section_id=1), None),
+    (AttendanceFilter(subject_id=1, section_id=1, start_date='2026-01-01', end_date='2026-06-30'), None),
+    (AttendanceFilter(), taught_by(2)),
+    (AttendanceFilter(start_date='2026-01-01'), taught_by(2)),
+], ids=['all', 'subject', 'section', 'every-filter', 'teacher', 'teacher-dates'])
+def test_export_query_streams_without_a_sort(export_db, filters, extra):
+    sql, params = export_query(filters, extra)
+    plan = [row[3] for row in export_db.execute("EXPLAIN QUERY PLAN " + sql, params)]
+    assert not [step for step in plan if 'TEMP B-TREE' in step], plan
+
+def test_export_chunks_are_bounded(export_db):
+    chunks = list(export_chunks(export_db, AttendanceFilter(), chunk_size=2))
+    assert [len(rows) for rows in chunks] == [2, 1]
+
+def test_export_filters_rows(export_db):
+    rows = [row for rows in export_chunks(export_db, AttendanceFilter(), taught_by(2)) for row in rows]
+    assert sorted(rows) == [
+        ('2026-03-01', '080BCT001', 'Sita', 'Rai', 'A', 'CT501', 'Computer Networks', 'present', '09:05', 'No'),
+        ('2026-03-02', '080BCT001', 'Sita', 'Rai', 'A', 'CT501', 'Computer Networks', 'late', '09:20', 'Yes'),
+    ]
+
+def test_csv_export(export_db):
+    parts = list(iter_csv(export_chunks(export_db, AttendanceFilter(section_id=2))))
+    # The header is its own part so the response starts before the query runs
+    assert parts[0] == ','.join(EXPORT_COLUMNS) + '\r\n'
+    assert list(csv.reader(io.StringIO(''.join(parts)))) == [
+        EXPORT_COLUMNS,
+        ['2026-03-01', '080BCT002', 'Ram', 'KC', 'B', 'CT502', 'Compilers', 'absent', '', 'No'],
+    ]
+
+def test_xlsx_export(export_db, tmp_path):
+    path = tmp_path / 'export.xlsx'
+    assert write_xlsx(export_chunks(export_db, AttendanceFilter(subject_id=1), chunk_size=1), str(path)) == 2
+    sheet = load_workbook(path, read_only=True).active
+    rows = list(sheet.iter_rows(values_only=True))
+    assert list(rows[0]) == EXPORT_COLUMNS
+    assert sorted(row[1:3] + row[7:] for row in rows[1:]) == [
+        ('080BCT001', 'Sita', 'late', '09:20', 'Yes'),
+        ('080BCT001', 'Sita', 'present', '09:05', 'No'),
+    ]
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from werkzeug.security import generate_password_hash
+
+pytest.importorskip('face_recognition')
+import app as attendance_app
+from face_gallery import encode_encoding
+from conftest import image_data_url, login
+
+CAMPUS = {'latitude': 27.6635, 'longitude': 85.3161}
+
+@pytest.fixture
+def subject(app_db):
+    # Taught by the seeded teacher1 (user 2) to section A
+    app_db.execute("""INSERT INTO subject (id, subject_code, subject_name, teacher_id, section_id)
+                      VALUES (1, 'CT501', 'Computer Networks', 2, 1)""")
+    app_db.commit()
+    return 1
+
+@pytest.fixture
+def encoded(monkeypatch):
+    frames = []
+    def encode_faces(rgb_image, max_width=None):
+        frames.append(rgb_image.shape)
+        return []
+    monkeypatch.setattr(attendance_app, 'encode_faces', encode_faces)
+    return frames
+
+def test_form_post_sends_every_frame(client, subject, encoded):
+    login(client, 'teacher1')
+    response = client.post('/teacher/face-attendance/match', data={
+        'subject_id': '1', 'section_id': '1', 'frames': [image_data_url(), image_data_url(16, 8)]})
+    assert response.get_json()['success']
+    assert encoded == [(8, 8, 3), (8, 16, 3)]
+
+@pytest.mark.parametrize('frames', [image_data_url(), {'0': image_data_url()}, [image_data_url(), 3]])
+def test_json_frames_must_be_a_list_of_images(client, subject, encoded, frames):
+    login(client, 'teacher1')
+    response = client.post('/teacher/face-attendance/match',
+                           json={'subject_id': 1, 'section_id': 1, 'frames': frames})
+    assert response.get_json() == {'success': False, 'message': 'frames must be a list of images'}
+    assert encoded == []
+
+def test_only_the_first_of_overlapping_marks_is_new(app_db):
+    # The second call stands in for an overlapping request: both try to insert student 7
+    assert attendance_app.mark_face_attendance(1, {7: 0.3, 8: 0.4}) == {7, 8}
+    assert attendance_app.mark_face_attendance(1, {7: 0.2, 9: 0.4}) == {9}
+    rows = app_db.execute("SELECT student_id, face_confidence FROM attendance ORDER BY student_id").fetchall()
+    assert [tuple(row) for row in rows] == [(7, 0.7), (8, 0.6), (9, 0.6)]
+
+@pytest.fixture
+def student(app_db, subject, monkeypatch):
+    """Student 'sita' of section A, whose every capture encodes to her enrolled face"""
+    face = np.full(128, 0.05, dtype=np.float32)
+    app_db.execute("""INSERT INTO user (id, username, password_hash, email, first_name, last_name, role)
+                      VALUES (10, 'sita', ?, 'sita@kec.edu.np', 'Sita', 'Rai', 'student')""",
+                   (generate_password_hash('pw', method='pbkdf2:sha256:1000'),))
+    app_db.execute("INSERT INTO student (id, user_id, student_id, section_id, face_encoding) VALUES (7, 10, '080BCT007', 1, ?)",
+                   (encode_encoding(face),))
+    app_db.commit()
+    monkeypatch.setattr(attendance_app, 'encode_faces', lambda rgb_image, max_width=None: [face])
+    return 7
+
+def open_session(conn, subject_id=1, section_id=1, minutes=30):
+    expires_at = (datetime.now() + timedelta(minutes=minutes)).strftime('%Y-%m-%d %H:%M:%S')
+    conn.execute("""INSERT INTO qr_sessions (session_code, subject_id, section_id, teacher_id, created_at, expires_at)
+                    VALUES (?, ?, ?, 2, datetime('now'), ?)""", (f'code-{subject_id}-{section_id}-{minutes}',
+                                                                 subject_id, section_id, expires_at))
+    conn.commit()
+
+def verify_face(client, **fields):
+    login(client, 'sita', 'pw')
+    return client.post('/student/verify-face', json={'image_data': image_data_url(), 'subject_id': 1, **fields}).get_json()
+
+def marked(conn):
+    return [row[0] for row in conn.execute("SELECT student_id FROM attendance")]
+
+def test_verify_face_marks_during_a_session_on_campus(client, app_db, student):
+    open_session(app_db)
+    result = verify_face(client, **CAMPUS)
+    assert result['success'] and not result['already_marked']
+    assert marked(app_db) == [student]
+    assert verify_face(client, **CAMPUS)['already_marked']
+
+@pytest.mark.parametrize('minutes, section_id', [(-5, 1), (30, 2)], ids=['expired', 'other-section'])
+def test_verify_face_needs_an_open_session_for_the_students_class(client, app_db, student, minutes, section_id):
+    open_session(app_db, section_id=section_id, minutes=minutes)
+    result = verify_face(client, **CAMPUS)
+    assert result == {'success': False, 'message': 'There is no attendance session open for this subject right now.'}
+    assert marked(app_db) == []
+
+@pytest.mark.parametrize('location', [{}, {'latitude': 'nan', 'longitude': 85.3161},
+                                      {'latitude': 27.70, 'longitude': 85.3161}],
+                         ids=['missing', 'nan', 'off-campus'])
+def test_verify_face_checks_the_location_on_the_server(client, app_db, student, location):
+    open_session(app_db)
+    result = verify_face(client, **location)
+    assert not result['success']
+    assert 'location' in result['message']
+    assert marked(app_db) == []
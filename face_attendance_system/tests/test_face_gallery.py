@@ -0,0 +1,51 @@
+import numpy as np
+from face_gallery import FaceGallery, pairwise_distances, build_template, verify
+from conftest import random_faces, same_face
+
+def test_pairwise_distances_match_numpy(rng):
+    probes, matrix = random_faces(rng, 5), random_faces(rng, 40)
+    sq_norms = np.einsum('ij,ij->i', matrix, matrix)
+    expected = np.linalg.norm(probes[:, None, :] - matrix[None, :, :], axis=2)
+    np.testing.assert_allclose(pairwise_distances(probes, matrix, sq_norms), expected, atol=1e-5)
+
+def test_match_finds_each_enrolled_student(rng):
+    faces = random_faces(rng, 60)
+    gallery = FaceGallery(np.arange(100, 160), faces)
+    results = gallery.match(same_face(rng, faces[[3, 42]]))
+    assert [student_id for student_id, _ in results] == [103, 142]
+    assert all(distance < 0.6 for _, distance in results)
+
+def test_match_rejects_strangers(rng):
+    gallery = FaceGallery(np.arange(60), random_faces(rng, 60))
+    (student_id, distance), = gallery.match(random_faces(rng, 1))
+    assert student_id is None and distance > 0.6
+
+def test_empty_gallery_matches_nothing(rng):
+    gallery = FaceGallery(np.empty(0), np.empty((0, 128)))
+    assert gallery.match(random_faces(rng, 2)) == [(None, None), (None, None)]
+
+def test_identify_gives_each_student_the_closest_face(rng):
+    faces = random_faces(rng, 10)
+    gallery = FaceGallery(np.arange(10), faces)
+    close, closer = same_face(rng, faces[[4]], noise=0.03), same_face(rng, faces[[4]], noise=0.005)
+    matches = gallery.identify(np.vstack([close, closer, same_face(rng, faces[[7]])]))
+    assert set(matches) == {4, 7}
+    assert np.isclose(matches[4], np.linalg.norm(closer[0] - faces[4]), atol=1e-5)
+
+def test_samples_rescue_a_near_threshold_template(rng):
+    base = random_faces(rng, 1)[0]
+    # Two enrollment photos far enough apart that their mean sits just past the tolerance from either
+    offset = rng.normal(size=128).astype(np.float32)
+    offset *= 1.24 / np.linalg.norm(offset)
+    samples = np.vstack([base, base + offset])
+    gallery = FaceGallery([7], build_template(samples)[None, :], [7, 7], samples)
+    probe = base + 0.001
+    assert np.linalg.norm(probe - build_template(samples)) > 0.6
+    (student_id, distance), = gallery.match(probe)
+    assert student_id == 7 and distance < 0.1
+
+def test_verify_against_one_student(rng):
+    faces = random_faces(rng, 2)
+    assert verify(same_face(rng, faces[:1]), faces[:1])[0]
+    assert not verify(faces[1:], faces[:1])[0]
+    assert verify(faces[:1], None) == (False, None)
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+from face_index import ExactIndex, IVFIndex, CampusIndex, create_index, save_index, load_index
+from conftest import random_faces, same_face
+
+@pytest.fixture
+def faces(rng):
+    return random_faces(rng, 2000)
+
+def filled(index, faces):
+    index.add(np.arange(1, len(faces) + 1), faces)
+    if isinstance(index, IVFIndex):
+        index.train()
+    return index
+
+def test_exact_search_finds_enrolled_and_rejects_strangers(rng, faces):
+    index = filled(ExactIndex(), faces)
+    results = index.search(np.vstack([same_face(rng, faces[[10, 1500]]), random_faces(rng, 1)]))
+    assert [student_id for student_id, _ in results] == [11, 1501, None]
+
+def test_add_replaces_and_remove_deletes(rng, faces):
+    index = filled(ExactIndex(), faces[:10])
+    index.add([3], faces[[500]])
+    index.remove([5, 999])
+    assert len(index) == 9
+    assert index.search(same_face(rng, faces[[500]]))[0][0] == 3
+    assert index.search(same_face(rng, faces[[4]]))[0][0] is None
+
+def test_ivf_recall_against_exact(rng, faces):
+    exact = filled(ExactIndex(), faces)
+    ivf = filled(IVFIndex(nlist=32, nprobe=4), faces)
+    assert len(ivf.centroids) == 32
+    probes = same_face(rng, faces[rng.choice(len(faces), 300, replace=False)])
+    expected = [student_id for student_id, _ in exact.search(probes)]
+    found = [student_id for student_id, _ in ivf.search(probes)]
+    recall = np.mean([a == b for a, b in zip(expected, found)])
+    assert recall >= 0.95
+
+def test_ivf_stays_exhaustive_until_trained(rng, faces):
+    ivf = filled(IVFIndex(nlist=32), faces[:50])
+    assert len(ivf.centroids) == 0
+    assert ivf.search(same_face(rng, faces[[7]]))[0][0] == 8
+
+def test_ivf_add_after_training_is_searchable(rng, faces):
+    ivf = filled(IVFIndex(nlist=32, nprobe=4), faces[:1000])
+    ivf.add([5000], faces[[1500]])
+    assert ivf.search(same_face(rng, faces[[1500]]))[0][0] == 5000
+
+@pytest.mark.parametrize('kind', ['exact', 'ivf'])
+def test_npz_round_trip(tmp_path, rng, faces, kind):
+    index = filled(create_index(kind, **({'nlist': 32, 'nprobe': 4} if kind == 'ivf' else {})), faces)
+    index.fingerprint = '2000:2000:2000'
+    path = str(tmp_path / 'face_index.npz')
+    save_index(index, path)
+    loaded = load_index(path)
+    assert type(loaded) is type(index) and loaded.fingerprint == '2000:2000:2000'
+    np.testing.assert_array_equal(loaded.ids, index.ids)
+    np.testing.assert_array_equal(loaded.vectors, index.vectors)
+    probes = same_face(rng, faces[:50])
+    assert loaded.search(probes) == index.search(probes)
+
+def test_campus_index_uses_a_matching_file(tmp_path, faces):
+    path = str(tmp_path / 'face_index.npz')
+    CampusIndex().rebuild(path, 'exact', lambda: (np.arange(1, 11), faces[:10]), fingerprint='a')
+
+    def loader():
+        raise AssertionError('should load the saved index')
+    assert len(CampusIndex().get(path, 'exact', loader, fingerprint='a')) == 10
+
+def test_campus_index_rebuilds_a_stale_file(tmp_path, rng, faces):
+    path = str(tmp_path / 'face_index.npz')
+    CampusIndex().rebuild(path, 'exact', lambda: (np.arange(1, 11), faces[:10]), fingerprint='a')
+    # A student was enrolled while no process had the index loaded
+    campus = CampusIndex()
+    index = campus.get(path, 'exact', lambda: (np.arange(1, 12), faces[:11]), fingerprint='b')
+    assert len(index) == 11
+    assert index.search(same_face(rng, faces[[10]]))[0][0] == 11
+
+def test_campus_index_keeps_its_own_incremental_changes(tmp_path, rng, faces):
+    path = str(tmp_path / 'face_index.npz')
+    campus = CampusIndex(save_delay=60)
+    campus.get(path, 'exact', lambda: (np.arange(1, 11), faces[:10]), fingerprint='a')
+    campus.upsert(11, faces[10], fingerprint='b')
+
+    def loader():
+        raise AssertionError('should not rebuild after its own upsert')
+    assert len(campus.get(path, 'exact', loader, fingerprint='b')) == 11
+    campus.discard()
+
+def test_campus_search_reloads_a_discarded_index(tmp_path, rng, faces):
+    path = str(tmp_path / 'face_index.npz')
+    campus = CampusIndex()
+    campus.rebuild(path, 'exact', lambda: (np.arange(1, 11), faces[:10]), fingerprint='a')
+    # Another worker's change was signalled between two requests
+    campus.discard()
+
+    def loader():
+        raise AssertionError('should load the saved index')
+    results = campus.search(same_face(rng, faces[[3]]), path, 'exact', loader, fingerprint='a')
+    assert results[0][0] == 4
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from geofence import Geofence, METERS_PER_DEGREE, parse_point, to_points
+
+CENTER = (27.6635, 85.3161)
+# A square lab block ~89 m on each side, north-east of the main circle
+LAB = [[27.6700, 85.3200], [27.6700, 85.3209], [27.6708, 85.3209], [27.6708, 85.3200]]
+
+@pytest.fixture
+def geofence():
+    return Geofence([
+        {'name': 'Main', 'center': list(CENTER), 'radius': 200},
+        {'name': 'Lab', 'points': LAB},
+    ])
+
+def north_of_center(meters):
+    return CENTER[0] + meters / METERS_PER_DEGREE, CENTER[1]
+
+def test_circle_boundary(geofence):
+    assert geofence.check(*north_of_center(199)) == ('Main', 0.0)
+    zone, distance = geofence.check(*north_of_center(201))
+    assert zone is None and distance == pytest.approx(1.0, abs=0.05)
+
+def test_polygon_inside_and_outside(geofence):
+    assert geofence.check(27.6704, 85.32045)[0] == 'Lab'
+    zone, distance = geofence.check(27.6704 + 10 / METERS_PER_DEGREE, 85.3209 + 0.0002)
+    assert zone is None
+    # ~19.7 m east of the east edge
+    assert distance == pytest.approx(0.0002 * METERS_PER_DEGREE * np.cos(np.radians(27.6704)), rel=0.01)
+
+def test_distance_is_to_the_nearest_zone(geofence):
+    zones, distances = geofence.check_many([north_of_center(250)[0], 27.6704], [CENTER[1], 85.3215])
+    assert list(zones) == [-1, -1]
+    assert distances[0] == pytest.approx(50, abs=0.5)
+    assert distances[1] == pytest.approx(0.0006 * METERS_PER_DEGREE * np.cos(np.radians(27.6704)), rel=0.01)
+
+def test_check_many_matches_check(geofence, rng):
+    lats = CENTER[0] + rng.uniform(-0.01, 0.01, 200)
+    lngs = CENTER[1] + rng.uniform(-0.01, 0.01, 200)
+    zones, distances = geofence.check_many(lats, lngs)
+    for lat, lng, zone, distance in zip(lats, lngs, zones, distances):
+        assert geofence.check(lat, lng) == ((geofence.names[zone] if zone >= 0 else None), pytest.approx(distance))
+
+@pytest.mark.parametrize('lat, lng', [
+    ('nan', '85.3'), ('27.6', 'inf'), ('-inf', '85.3'), (float('nan'), 85.3),
+    ('91', '85.3'), ('27.6', '-180.5'), ('', '85.3'), (None, None), ('abc', '85.3'),
+])
+def test_invalid_points_raise(geofence, lat, lng):
+    with pytest.raises(ValueError):
+        parse_point(lat, lng)
+    with pytest.raises(ValueError):
+        geofence.check(lat, lng)
+
+def test_text_coordinates_are_parsed():
+    assert parse_point('27.6635', '85.3161') == CENTER
+
+def test_invalid_points_in_a_batch_get_nan(geofence):
+    zones, distances = geofence.check_many(['27.6635', 'nan', 'x', None], ['85.3161', '85.3', '85.3', '85.3'])
+    assert list(zones) == [0, -1, -1, -1]
+    assert distances[0] == 0.0 and np.isnan(distances[1:]).all()
+
+def test_to_points_mask():
+    _, _, valid = to_points([90, -90, 90.01, 0], [180, -180, 0, 180.01])
+    assert list(valid) == [True, True, False, False]
+
+def test_no_zones_means_nothing_is_inside():
+    zone, distance = Geofence([]).check(*CENTER)
+    assert zone is None and distance == np.inf
+
+def test_zone_without_shape_is_rejected():
+    with pytest.raises(ValueError):
+        Geofence([{'name': 'Nowhere'}])
@@ -0,0 +1,36 @@
+import base64
+import cv2
+import numpy as np
+import pytest
+from image_io import split_data_url, decode_image_bytes, decode_image_data, save_image_async
+
+@pytest.fixture
+def png_bytes():
+    image = np.zeros((8, 12, 3), dtype=np.uint8)
+    image[:, :, 2] = 255  # red in OpenCV's BGR order
+    return cv2.imencode('.png', image)[1].tobytes()
+
+def test_data_url_and_bare_base64_decode_alike(png_bytes):
+    encoded = base64.b64encode(png_bytes).decode('ascii')
+    assert split_data_url(encoded) == png_bytes
+    assert split_data_url('data:image/png;base64,' + encoded) == png_bytes
+
+def test_decoded_image_is_rgb(png_bytes):
+    image = decode_image_data('data:image/png;base64,' + base64.b64encode(png_bytes).decode('ascii'))
+    assert image.shape == (8, 12, 3)
+    assert tuple(image[0, 0]) == (255, 0, 0)
+
+def test_invalid_base64_is_a_value_error():
+    with pytest.raises(ValueError, match='Invalid base64'):
+        split_data_url('abc')
+
+@pytest.mark.parametrize('data', ['data:image/png;base64,', 'data:image/png;base64,@@@', 'bm90IGFuIGltYWdl'])
+def test_empty_or_undecodable_images_are_value_errors(data):
+    with pytest.raises(ValueError):
+        decode_image_data(data)
+
+def test_save_image_async_writes_the_original_bytes(tmp_path, png_bytes):
+    path = tmp_path / 'faces' / 'student_1.png'
+    save_image_async(str(path), png_bytes).result(timeout=5)
+    assert path.read_bytes() == png_bytes
+    assert list(path.parent.iterdir()) == [path]
@@ -0,0 +1,59 @@
+import sqlite3
+import pytest
+from database import migrate_schema, column_names
+
+def create_things(conn):
+    conn.execute("CREATE TABLE thing (id INTEGER PRIMARY KEY)")
+
+def add_name(conn):
+    conn.execute("ALTER TABLE thing ADD COLUMN name TEXT")
+
+def broken(conn):
+    conn.execute("CREATE TABLE half_done (id INTEGER)")
+    raise RuntimeError('migration failed')
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:', isolation_level=None)
+    yield conn
+    conn.close()
+
+def test_migrations_run_once_in_order(conn):
+    assert migrate_schema(conn, [create_things, add_name]) == ['create_things', 'add_name']
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 2
+    assert column_names(conn, 'thing') == {'id', 'name'}
+    assert migrate_schema(conn, [create_things, add_name]) == []
+
+def test_only_new_migrations_are_applied(conn):
+    migrate_schema(conn, [create_things])
+    assert migrate_schema(conn, [create_things, add_name]) == ['add_name']
+
+def test_failed_migration_is_rolled_back(conn):
+    with pytest.raises(RuntimeError):
+        migrate_schema(conn, [create_things, broken])
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 1
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'half_done'").fetchone() is None
+
+def test_duplicate_attendance_is_a_no_op(app_db):
+    insert = """
+        INSERT INTO attendance (student_id, subject_id, class_date, status)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (student_id, subject_id, class_date) DO NOTHING
+    """
+    assert app_db.execute(insert, (1, 1, '2026-03-02', 'present')).rowcount == 1
+    assert app_db.execute(insert, (1, 1, '2026-03-02', 'absent')).rowcount == 0
+    assert app_db.execute(insert, (1, 2, '2026-03-02', 'absent')).rowcount == 1
+    app_db.commit()
+    assert app_db.execute("SELECT status FROM attendance WHERE subject_id = 1").fetchall()[0][0] == 'present'
+
+def test_attendance_index_migration_keeps_the_latest_duplicate(app_db):
+    import app as attendance_app
+    app_db.execute("DROP INDEX idx_attendance_student_subject_date")
+    app_db.executemany("INSERT INTO attendance (student_id, subject_id, class_date, status) VALUES (?, ?, ?, ?)", [
+        (1, 1, '2026-03-02', 'absent'), (1, 1, '2026-03-02', 'present'), (2, 1, '2026-03-02', 'late')])
+    attendance_app.migration_002_attendance_indexes(app_db)
+    app_db.commit()
+    rows = app_db.execute("SELECT student_id, status FROM attendance ORDER BY student_id").fetchall()
+    assert [tuple(row) for row in rows] == [(1, 'present'), (2, 'late')]
+    with pytest.raises(sqlite3.IntegrityError):
+        app_db.execute("INSERT INTO attendance (student_id, subject_id, class_date, status) VALUES (1, 1, '2026-03-02', 'late')")
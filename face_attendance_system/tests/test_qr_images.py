@@ -0,0 +1,57 @@
+import pytest
+from werkzeug.security import generate_password_hash
+
+pytest.importorskip('face_recognition')
+import app as attendance_app
+from conftest import login
+from qr_codes import payload_key, qr_cache
+
+@pytest.fixture
+def student_client(client, app_db):
+    app_db.execute("""INSERT INTO user (id, username, password_hash, email, first_name, last_name, role)
+                      VALUES (10, 'sita', ?, 'sita@kec.edu.np', 'Sita', 'Rai', 'student')""",
+                   (generate_password_hash('pw', method='pbkdf2:sha256:1000'),))
+    app_db.execute("INSERT INTO student (id, user_id, student_id, section_id) VALUES (7, 10, '080BCT007', 1)")
+    app_db.commit()
+    login(client, 'sita', 'pw')
+    return client
+
+def current_etag(app_db):
+    student = app_db.execute("""SELECT s.*, u.first_name, u.last_name FROM student s
+                                JOIN user u ON s.user_id = u.id WHERE s.id = 7""").fetchone()
+    return payload_key(attendance_app.student_qr_payload(student))
+
+def test_versioned_url_is_cached_for_a_day(student_client, app_db):
+    etag = current_etag(app_db)
+    response = student_client.get(f'/student/my-qr.png?v={etag}')
+    assert response.status_code == 200
+    assert response.mimetype == 'image/png'
+    assert response.data.startswith(b'\x89PNG')
+    assert response.get_etag() == (etag, False)
+    assert response.cache_control.private
+    assert response.cache_control.max_age == 86400
+    assert not response.cache_control.no_cache
+
+def test_unversioned_url_must_revalidate(student_client):
+    response = student_client.get('/student/my-qr.png')
+    assert response.status_code == 200
+    assert response.cache_control.max_age == 0
+    assert response.cache_control.no_cache
+
+def test_matching_etag_gets_a_304_without_a_render(student_client, app_db):
+    etag = current_etag(app_db)
+    student_client.get('/student/my-qr.png')
+    misses = qr_cache.misses
+    response = student_client.get('/student/my-qr.png', headers={'If-None-Match': f'"{etag}"'})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert qr_cache.misses == misses
+
+def test_changed_payload_gets_a_new_image(student_client, app_db):
+    old_etag = current_etag(app_db)
+    app_db.execute("UPDATE user SET last_name = 'Thapa' WHERE id = 10")
+    app_db.commit()
+    response = student_client.get('/student/my-qr.png', headers={'If-None-Match': f'"{old_etag}"'})
+    assert response.status_code == 200
+    assert response.get_etag() == (current_etag(app_db), False)
+    assert response.get_etag()[0] != old_etag
@@ -0,0 +1,66 @@
+import pytest
+from qr_codes import RotatingTokenSigner, InvalidToken
+
+NOW = 1_700_000_000.0  # a slot boundary for a 10 s period
+EXPIRES = NOW + 900
+
+@pytest.fixture
+def signer():
+    return RotatingTokenSigner('secret', period=10, skew=1)
+
+def test_fresh_token_verifies_to_its_claims(signer):
+    token = signer.issue('ABC123', 4, 2, EXPIRES, now=NOW)
+    assert signer.verify(token, now=NOW + 3) == {
+        'session_code': 'ABC123', 'subject_id': 4, 'section_id': 2, 'expires_at': int(EXPIRES)}
+
+def test_previous_slot_is_accepted_within_skew(signer):
+    token = signer.issue('ABC123', 4, 2, EXPIRES, now=NOW)
+    assert signer.verify(token, now=NOW + 19)['session_code'] == 'ABC123'
+
+def test_rotated_token_is_rejected(signer):
+    token = signer.issue('ABC123', 4, 2, EXPIRES, now=NOW)
+    with pytest.raises(InvalidToken, match='rotated'):
+        signer.verify(token, now=NOW + 20)
+
+def test_token_from_the_future_is_rejected(signer):
+    token = signer.issue('ABC123', 4, 2, EXPIRES, now=NOW + 30)
+    with pytest.raises(InvalidToken, match='rotated'):
+        signer.verify(token, now=NOW)
+
+def test_token_is_rejected_once_the_session_expires(signer):
+    token = signer.issue('ABC123', 4, 2, NOW + 5, now=NOW)
+    with pytest.raises(InvalidToken, match='expired'):
+        signer.verify(token, now=NOW + 5)
+
+@pytest.mark.parametrize('position, value', [
+    (1, 'OTHER1'),  # session code
+    (2, '5'),  # subject
+    (3, '3'),  # section
+    (4, str(int(EXPIRES) + 3600)),  # stretched expiry
+    (5, str(int(NOW // 10) + 1)),  # later slot
+])
+def test_tampered_claims_fail_the_signature(signer, position, value):
+    parts = signer.issue('ABC123', 4, 2, EXPIRES, now=NOW).split('.')
+    parts[position] = value
+    with pytest.raises(InvalidToken, match='signature'):
+        signer.verify('.'.join(parts), now=NOW)
+
+def test_token_from_another_secret_is_rejected(signer):
+    token = RotatingTokenSigner('other', period=10).issue('ABC123', 4, 2, EXPIRES, now=NOW)
+    with pytest.raises(InvalidToken, match='signature'):
+        signer.verify(token, now=NOW)
+
+@pytest.mark.parametrize('token', [None, '', 'ABC123', 'v0.a.1.2.3.4.sig', 'v1.a.1.2.3.4', 'v1.a.1.2.3.4.sig.extra'])
+def test_malformed_tokens_are_rejected(signer, token):
+    with pytest.raises(InvalidToken):
+        signer.verify(token, now=NOW)
+
+def test_signed_non_numeric_claims_are_malformed():
+    signer = RotatingTokenSigner('secret', period=10)
+    message = 'v1.ABC123.x.2.100.5'
+    with pytest.raises(InvalidToken, match='Malformed'):
+        signer.verify(f"{message}.{signer._sign(message)}", now=NOW)
+
+def test_seconds_left_counts_down_to_the_next_slot(signer):
+    assert signer.seconds_left(now=NOW) == 10
+    assert signer.seconds_left(now=NOW + 7.5) == 2.5
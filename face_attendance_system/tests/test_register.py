@@ -0,0 +1,93 @@
+import sqlite3
+import numpy as np
+import pytest
+from reports import build_register, RegisterCache, register_version
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.executescript("""
+        CREATE TABLE user (id INTEGER PRIMARY KEY, first_name TEXT, last_name TEXT);
+        CREATE TABLE student (id INTEGER PRIMARY KEY, user_id INTEGER, student_id TEXT, section_id INTEGER,
+                              roll_number INTEGER);
+        CREATE TABLE attendance (id INTEGER PRIMARY KEY, student_id INTEGER, subject_id INTEGER,
+                                 class_date TEXT, status TEXT);
+        CREATE TABLE attendance_version (subject_id INTEGER PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0);
+        INSERT INTO user VALUES (1, 'Sita', 'Rai'), (2, 'Ram', 'KC'), (3, 'Hari', 'Thapa'), (4, 'Gita', 'Rai');
+        -- Roster order is roll number, not id
+        INSERT INTO student VALUES (10, 1, '080BCT003', 1, 3), (11, 2, '080BCT001', 1, 1),
+                                   (12, 3, '080BCT002', 1, 2), (13, 4, '080BCT009', 2, 1);
+        INSERT INTO attendance (student_id, subject_id, class_date, status) VALUES
+            (10, 1, '2026-03-03', 'present'), (11, 1, '2026-03-03', 'absent'),
+            (10, 1, '2026-03-01', 'late'), (11, 1, '2026-03-01', 'present'),
+            (11, 1, '2026-03-02', 'present'),
+            (10, 2, '2026-03-04', 'present'),  -- other subject
+            (13, 1, '2026-03-05', 'present');  -- other section
+    """)
+    yield conn
+    conn.close()
+
+def test_register_pivots_students_by_dates(conn):
+    register = build_register(conn, 1, 1)
+    assert [s['student_code'] for s in register.students] == ['080BCT001', '080BCT002', '080BCT003']
+    assert register.dates == ['2026-03-01', '2026-03-02', '2026-03-03']
+    assert [row['cells'] for row in register.page(1)] == [
+        ['P', 'P', 'A'],
+        ['', '', ''],  # on the roster, never marked
+        ['L', '', 'P'],
+    ]
+    assert register.present.tolist() == [2, 0, 1]
+    assert register.total.tolist() == [3, 0, 2]
+    assert register.percent.tolist() == [66.7, 0.0, 50.0]
+    assert register.present_by_date.tolist() == [1, 1, 1]
+
+def test_register_matches_the_raw_rows(conn):
+    rng = np.random.default_rng(0)
+    conn.execute("DELETE FROM attendance")
+    conn.executemany("INSERT INTO user VALUES (?, 'F', 'L')", [(i,) for i in range(100, 220)])
+    conn.executemany("INSERT INTO student VALUES (?, ?, ?, 3, ?)",
+                     [(i, i, f'081BCT{i:03d}', i) for i in range(100, 220)])
+    statuses = np.array(['present', 'absent', 'late'])
+    rows = [(int(s), f'2026-{1 + d // 28:02d}-{1 + d % 28:02d}', str(statuses[rng.integers(3)]))
+            for s in range(100, 220) for d in range(90) if rng.random() < 0.9]
+    conn.executemany("INSERT INTO attendance (student_id, subject_id, class_date, status) VALUES (?, 1, ?, ?)", rows)
+    register = build_register(conn, 1, 3)
+    assert register.codes.shape == (120, 90)
+    labels = {'present': 'P', 'absent': 'A', 'late': 'L'}
+    cells = {(row['student']['id'], date): cell
+             for page in range(1, register.pages() + 1) for row in register.page(page)
+             for date, cell in zip(register.dates, row['cells'])}
+    assert {key: cell for key, cell in cells.items() if cell} == {(s, d): labels[st] for s, d, st in rows}
+
+def test_empty_section(conn):
+    register = build_register(conn, 1, 99)
+    assert len(register) == 0 and register.dates == [] and register.page(1) == []
+
+def test_pages_split_the_roster(conn):
+    register = build_register(conn, 1, 1)
+    assert register.pages(per_page=2) == 2
+    assert [row['student']['student_code'] for row in register.page(2, per_page=2)] == ['080BCT003']
+    # Out-of-range pages clamp to the nearest one
+    assert register.page(9, per_page=2) == register.page(2, per_page=2)
+
+def test_cache_rebuilds_after_a_write_or_roster_change(conn):
+    cache = RegisterCache()
+    first = cache.get(conn, 1, 1)
+    assert cache.get(conn, 1, 1) is first
+    conn.execute("INSERT INTO attendance_version VALUES (1, 1)")  # what the attendance triggers do
+    second = cache.get(conn, 1, 1)
+    assert second is not first
+    conn.execute("INSERT INTO user VALUES (5, 'New', 'Student')")
+    conn.execute("INSERT INTO student VALUES (14, 5, '080BCT004', 1, 4)")
+    assert len(cache.get(conn, 1, 1)) == 4
+
+def test_attendance_writes_bump_the_version(app_db):
+    before = register_version(app_db, 1, 1)
+    app_db.execute("INSERT INTO attendance (student_id, subject_id, class_date, status) VALUES (5, 1, '2026-03-02', 'present')")
+    after_insert = register_version(app_db, 1, 1)
+    app_db.execute("UPDATE attendance SET status = 'late' WHERE student_id = 5")
+    after_update = register_version(app_db, 1, 1)
+    app_db.execute("DELETE FROM attendance WHERE student_id = 5")
+    assert before < after_insert < after_update < register_version(app_db, 1, 1)
+    assert register_version(app_db, 2, 1) == (0,) + before[1:]
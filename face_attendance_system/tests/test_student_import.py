@@ -0,0 +1,131 @@
+import io
+import sqlite3
+from functools import partial
+import openpyxl
+import pytest
+import student_import
+from werkzeug.security import check_password_hash, generate_password_hash
+from student_import import POOL_THRESHOLD, hash_passwords, hash_pool, import_students, insert_students, read_rows
+
+HEADER = 'username,email,first_name,last_name,student_id,section,password,roll_number\n'
+
+def fake_hash(password):
+    return f'hashed:{password}'
+
+@pytest.fixture(autouse=True)
+def fast_hashing(monkeypatch):
+    # PBKDF2 takes ~0.3 s per password, the import logic does not depend on it
+    monkeypatch.setattr(student_import, 'generate_password_hash', fake_hash)
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.executescript("""
+        CREATE TABLE section (id INTEGER PRIMARY KEY, name TEXT);
+        CREATE TABLE user (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL UNIQUE,
+                           password_hash TEXT NOT NULL, email TEXT NOT NULL UNIQUE, first_name TEXT,
+                           last_name TEXT, role TEXT, is_active INTEGER);
+        CREATE TABLE student (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,
+                              student_id TEXT NOT NULL UNIQUE, section_id INTEGER, roll_number INTEGER);
+        INSERT INTO section VALUES (1, 'A'), (2, 'B');
+        INSERT INTO user VALUES (1, 'ram', 'x', 'ram@kec.edu.np', 'Ram', 'KC', 'student', 1);
+        INSERT INTO student VALUES (1, 1, '080BCT001', 1, 1);
+    """)
+    yield conn
+    conn.close()
+
+def run(conn, text, default_password=None):
+    return import_students(conn, io.BytesIO(text.encode('utf-8')), 'intake.csv', default_password)
+
+def test_valid_rows_are_imported(conn):
+    imported, errors = run(conn, HEADER +
+                           'sita,sita@kec.edu.np,Sita,Rai,080BCT002,A,pw1,2\n'
+                           'hari,hari@kec.edu.np,Hari,Thapa,080BCT003,2,,\n', default_password='kec123')
+    assert (imported, errors) == (2, [])
+    rows = conn.execute("""
+        SELECT u.username, u.password_hash, s.student_id, s.section_id, s.roll_number
+        FROM student s JOIN user u ON s.user_id = u.id WHERE s.id > 1 ORDER BY s.id
+    """).fetchall()
+    assert [tuple(row) for row in rows] == [
+        ('sita', 'hashed:pw1', '080BCT002', 1, 2),
+        ('hari', 'hashed:kec123', '080BCT003', 2, None),
+    ]
+
+def test_each_bad_row_is_reported_with_its_line(conn):
+    imported, errors = run(conn, HEADER +
+                           'sita,sita@kec.edu.np,Sita,Rai,080BCT002,A,pw,\n'    # line 2: ok
+                           'gita,,Gita,Rai,080BCT004,A,pw,\n'                   # 3: missing email
+                           'mina,mina-at-kec,Mina,Rai,080BCT005,A,pw,\n'        # 4: bad email
+                           'hari,hari@kec.edu.np,Hari,Thapa,080BCT006,Z,pw,\n'  # 5: unknown section
+                           'ram,ram2@kec.edu.np,Ram,KC,080BCT007,A,pw,\n'       # 6: existing username
+                           'sita2,s2@kec.edu.np,Sita,Rai,080BCT002,A,pw,\n'     # 7: duplicate within the file
+                           'tara,tara@kec.edu.np,Tara,Rai,080BCT008,A,pw,x\n'   # 8: bad roll number
+                           'bina,bina@kec.edu.np,Bina,Rai,080BCT009,A,,\n'      # 9: no password
+                           '\n'
+                           'kiran,kiran@kec.edu.np,Kiran,Rai,080BCT010,B,pw,3\n')  # 11: ok
+    assert imported == 2
+    assert errors == [
+        (3, 'missing email'),
+        (4, "invalid email 'mina-at-kec'"),
+        (5, "unknown section 'Z'"),
+        (6, "username 'ram' already exists"),
+        (7, "student_id '080BCT002' already exists"),
+        (8, "roll number 'x' is not a number"),
+        (9, 'missing password and no default password given'),
+    ]
+
+def test_missing_columns_fail_the_file(conn):
+    with pytest.raises(ValueError, match='student_id, section'):
+        run(conn, 'username,email,first_name,last_name\nsita,s@kec.edu.np,Sita,Rai\n')
+
+@pytest.mark.parametrize('data', [b'not a spreadsheet', b'PK\x03\x04 truncated zip'])
+def test_malformed_xlsx_is_a_value_error(data):
+    with pytest.raises(ValueError, match='not a valid CSV or Excel file'):
+        list(read_rows(io.BytesIO(data), 'intake.xlsx'))
+
+def test_xlsx_rows_and_numbers(conn):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['Username', 'Email', 'First Name', 'Last Name', 'Student ID', 'Section', 'Password', 'Roll Number'])
+    sheet.append(['sita', 'sita@kec.edu.np', 'Sita', 'Rai', '080BCT002', 'A', 'pw', 2.0])
+    sheet.append([None] * 8)
+    sheet.append(['hari', 'hari@kec.edu.np', 'Hari', 'Thapa', '080BCT003', 2, 'pw', None])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    imported, errors = import_students(conn, buffer, 'intake.xlsx')
+    assert (imported, errors) == (2, [])
+    assert conn.execute("SELECT roll_number FROM student WHERE student_id = '080BCT002'").fetchone()[0] == 2
+
+def test_rows_taken_after_validation_are_reported_not_fatal(conn):
+    # Another import created 'sita' between validation and the insert
+    records = [
+        {'line': 2, 'username': 'sita', 'email': 'sita@kec.edu.np', 'first_name': 'Sita', 'last_name': 'Rai',
+         'student_id': '080BCT002', 'section_id': 1, 'roll_number': None, 'password': 'pw'},
+        {'line': 3, 'username': 'hari', 'email': 'hari@kec.edu.np', 'first_name': 'Hari', 'last_name': 'Thapa',
+         'student_id': '080BCT001', 'section_id': 1, 'roll_number': None, 'password': 'pw'},
+        {'line': 4, 'username': 'gita', 'email': 'gita@kec.edu.np', 'first_name': 'Gita', 'last_name': 'Rai',
+         'student_id': '080BCT004', 'section_id': 1, 'roll_number': None, 'password': 'pw'},
+    ]
+    conn.execute("INSERT INTO user (username, password_hash, email) VALUES ('sita', 'x', 'other@kec.edu.np')")
+    conn.commit()
+    errors = insert_students(conn, records, ['h1', 'h2', 'h3'])
+    assert errors == [(2, "username 'sita' already exists"), (3, "student_id '080BCT001' already exists")]
+    # The clashing rows left nothing behind, the good one went in
+    assert conn.execute("SELECT COUNT(*) FROM user WHERE username = 'hari'").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM student WHERE student_id = '080BCT004'").fetchone()[0] == 1
+    assert not conn.in_transaction
+
+def test_pool_hashes_and_can_be_reused(monkeypatch):
+    # Real PBKDF2 in spawned workers, with few iterations to keep the test quick
+    monkeypatch.setattr(student_import, 'generate_password_hash',
+                        partial(generate_password_hash, method='pbkdf2:sha256:1000'))
+    passwords = [f'pw{i}' for i in range(POOL_THRESHOLD)]
+    pool = hash_pool(2)
+    try:
+        for _ in range(2):
+            hashes = hash_passwords(passwords, pool)
+            assert all(check_password_hash(h, p) for h, p in zip(hashes, passwords))
+    finally:
+        pool.shutdown()